@@ -1,6 +1,11 @@
+import eventlet
+# Patch sockets and threading before anything else is imported so the MariaDB
+# driver and the connection pool cooperate with the eventlet hub
+eventlet.monkey_patch()
+
 import os
 from flask_mail import Mail
-from flask import Flask, jsonify, send_from_directory, session
+from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, disconnect
 import logging
@@ -18,10 +23,11 @@ logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key_here'
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587  # For TLS (use 465 for SSL)
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USE_SSL'] = False
+# SMTP server, overridable to point at a local stand-in (e.g. `python -m aiosmtpd -n -l localhost:8025`)
+app.config['MAIL_SERVER'] = os.getenv('BACKEND_MAIL_SERVER') or 'smtp.gmail.com'
+app.config['MAIL_PORT'] = int(os.getenv('BACKEND_MAIL_PORT') or 587)  # For TLS (use 465 for SSL)
+app.config['MAIL_USE_TLS'] = (os.getenv('BACKEND_MAIL_USE_TLS') or 'true').lower() == 'true'
+app.config['MAIL_USE_SSL'] = (os.getenv('BACKEND_MAIL_USE_SSL') or 'false').lower() == 'true'
 app.config['MAIL_USERNAME'] = os.getenv('EMAIL_USER')
 app.config['MAIL_PASSWORD'] = os.getenv('EMAIL_PWD')
 app.config['MAIL_DEFAULT_SENDER'] = os.getenv('EMAIL_USER')
@@ -29,6 +35,9 @@ app.config['MAIL_DEFAULT_SENDER'] = os.getenv('EMAIL_USER')
 # Configure upload folder
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'shared/uploads')
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Larger requests are answered 413 before their body is read
+from utils import image_pipeline
+app.config['MAX_CONTENT_LENGTH'] = image_pipeline.MAX_REQUEST_BYTES
 
 # Use custom JSON encoder
 app.json_encoder = CustomJSONEncoder
@@ -36,25 +45,86 @@ app.json_encoder = CustomJSONEncoder
 mail = Mail(app)
 CORS(app, supports_credentials=True)
 
-socketio = SocketIO(app, cors_allowed_origins="*", json=json)
-
-# Socket authentication middleware
-@socketio.on('connect')
-def handle_connect():
-    if 'user_id' not in session:
-        logging.error("Unauthorized socket connection attempt")
-        return False  # Reject the connection
-    return True
-
+# Pub/sub backplane shared by the backend workers (e.g. redis://redis:6379/0), so an
+# emit reaches sockets connected to any worker. Unset for a single worker.
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    json=json,
+    message_queue=os.getenv('BACKEND_SOCKETIO_MESSAGE_QUEUE') or None
+)
+
+from config.database import pool as db_pool
+from utils.email_dispatcher import EmailDispatcher
+from models.email_model import EmailOutboxModel
+from utils import password_hashing
+from utils import notify
+from utils import presence
+from utils.cache_bus import bus as cache_bus
+from utils.presence import ConnectionStateWriter
+
+# Outgoing emails are queued in email_outbox and sent in the background; the
+# dispatcher is started by the first request so CLI commands don't run it
+email_dispatcher = EmailDispatcher(app, mail, socketio)
+
+@app.before_request
+def start_email_dispatcher():
+    email_dispatcher.start()
+    cache_bus.start(socketio)
+
+# users.is_connected/latest_connection follow the socket presence, written with a
+# delay by a background task started on the first socket connection
+connection_state = ConnectionStateWriter(socketio, presence.registry)
+
+# Typing indicators relayed on state changes only, expired by a background task
+# started with the connection state writer (see utils/typing_state.py)
+from utils.typing_state import TypingTracker
+typing_tracker = TypingTracker(socketio, notify.conversation_room)
+
+# Optional group commit of chat messages: rows sent within a few milliseconds are
+# stored with one multi-row INSERT and one commit (see utils/message_writer.py)
+from utils.message_writer import MessageWriter
+from models.conv_model import ConversationModel
+message_writer = None
+if (os.getenv('BACKEND_MESSAGE_BATCHING') or 'false').lower() == 'true':
+    message_writer = MessageWriter(
+        socketio,
+        ConversationModel.insert_messages,
+        window=float(os.getenv('BACKEND_MESSAGE_BATCH_WINDOW_MS') or 5) / 1000,
+        max_batch=int(os.getenv('BACKEND_MESSAGE_BATCH_SIZE') or 200)
+    )
+
+from models.conv_model import membership_cache
+from models.user_model import UserModel
 from routes.auth_routes import auth_bp
 from routes.user_routes import user_bp
 from routes.conv_routes import conv_bp
+# Socket.IO events, registered when the module is imported
+from routes.socket_routes import router as socket_router
+from utils.metrics import socket_event_latency
+from middleware.auth_middleware import metrics_token_required
 
 # Enregistrer les routes
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(user_bp, url_prefix='/api/user')
 app.register_blueprint(conv_bp, url_prefix='/api/conv')
 
+from commands import register_commands
+register_commands(app)
+
+# Map the password word automaton now rather than during the first registration
+from utils.word_automaton import load_automaton
+try:
+    load_automaton()
+except (OSError, ValueError) as e:
+    logging.error(f"Word automaton unavailable, run `python -m utils.word_automaton`: {e}")
+
+# Bring the schema up to date before serving (disable with BACKEND_MIGRATE_ON_STARTUP=false
+# and run `flask db-migrate` instead)
+if (os.getenv('BACKEND_MIGRATE_ON_STARTUP') or 'true').lower() != 'false':
+    from utils.migrations import run_migrations
+    run_migrations()
+
 # Route to serve uploaded files
 @app.route('/shared/uploads/<path:filename>')
 def uploaded_file(filename):
@@ -65,11 +135,35 @@ def uploaded_file(filename):
 def health():
     return jsonify({"status": "ok"}), 200
 
+# Runtime metrics (connection pool, ...), for operators holding BACKEND_METRICS_TOKEN
+@app.route('/api/metrics', methods=['GET'])
+@metrics_token_required
+def metrics():
+    return jsonify({
+        "db_pool": db_pool.stats(),
+        "membership_cache": membership_cache.stats(),
+        "user_cache": UserModel.cache_stats(),
+        "cache_bus": cache_bus.stats(),
+        "email_dispatcher": email_dispatcher.stats(),
+        "email_outbox": EmailOutboxModel.stats(),
+        "password_hashing": password_hashing.stats(),
+        "image_pipeline": image_pipeline.stats(),
+        "notifications": notify.stats(),
+        "presence": {**presence.registry.stats(), "writer": connection_state.stats()},
+        "socket_events": socket_event_latency.stats(),
+        "typing": typing_tracker.stats(),
+        "message_writer": message_writer.stats() if message_writer else None
+    }), 200
+
 # Gestion des erreurs globales
 @app.errorhandler(404)
 def not_found_error(error):
     return jsonify({"error": "Not Found"}), 404
 
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({"error": "Request too large"}), 413
+
 # Gestion des erreurs serveur
 @app.errorhandler(500)
 def internal_error(error):
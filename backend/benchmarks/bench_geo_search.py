@@ -0,0 +1,103 @@
+"""
+Compare distance-filtered candidate discovery on a synthetic users table:
+  - full: fetch every row and run haversine in Python (previous get_potential_matches path)
+  - bbox: bounding-box predicate on the (latitude, longitude) index, haversine on survivors
+
+Run from backend/ with the usual BACKEND_DATABASE_* variables:
+    python -m benchmarks.bench_geo_search --users 1000000
+"""
+import argparse
+import random
+import time
+from config.database import get_connection
+from utils.geo import haversine, bounding_box
+
+TABLE = 'bench_geo_users'
+
+
+def populate(cursor, connection, count):
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"""
+        CREATE TABLE {TABLE} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            latitude DECIMAL(10, 8),
+            longitude DECIMAL(11, 8),
+            INDEX idx_location (latitude, longitude)
+        )
+    """)
+    batch = []
+    for _ in range(count):
+        # Roughly the spread of the seed data: mostly Europe, some worldwide
+        if random.random() < 0.8:
+            batch.append((random.uniform(36, 60), random.uniform(-10, 30)))
+        else:
+            batch.append((random.uniform(-60, 70), random.uniform(-179, 179)))
+        if len(batch) == 10000:
+            cursor.executemany(f"INSERT INTO {TABLE} (latitude, longitude) VALUES (%s, %s)", batch)
+            connection.commit()
+            batch = []
+    if batch:
+        cursor.executemany(f"INSERT INTO {TABLE} (latitude, longitude) VALUES (%s, %s)", batch)
+        connection.commit()
+    cursor.execute(f"ANALYZE TABLE {TABLE}")
+    cursor.fetchall()
+
+
+def full_scan(cursor, lat, lon, distance):
+    cursor.execute(f"SELECT id, latitude, longitude FROM {TABLE}")
+    return [row[0] for row in cursor.fetchall()
+            if haversine(lat, lon, float(row[1]), float(row[2])) <= distance]
+
+
+def bbox_scan(cursor, lat, lon, distance):
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, distance)
+    query = f"SELECT id, latitude, longitude FROM {TABLE} WHERE latitude BETWEEN %s AND %s"
+    params = [min_lat, max_lat]
+    if min_lon is not None:
+        query += " AND longitude BETWEEN %s AND %s"
+        params.extend([min_lon, max_lon])
+    cursor.execute(query, tuple(params))
+    return [row[0] for row in cursor.fetchall()
+            if haversine(lat, lon, float(row[1]), float(row[2])) <= distance]
+
+
+def timed(fn, *args, repeat=3):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--reuse', action='store_true', help="skip populating, reuse an existing table")
+    parser.add_argument('--keep', action='store_true', help="do not drop the synthetic table afterwards")
+    args = parser.parse_args()
+
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        if not args.reuse:
+            print(f"Populating {TABLE} with {args.users} users...")
+            populate(cursor, connection, args.users)
+
+        origin = (48.8566, 2.3522)  # Paris
+        for distance in (5, 25, 100, 500):
+            full_time, full_ids = timed(full_scan, cursor, origin[0], origin[1], distance)
+            bbox_time, bbox_ids = timed(bbox_scan, cursor, origin[0], origin[1], distance)
+            assert sorted(full_ids) == sorted(bbox_ids), "bbox prefilter changed the result set"
+            print(f"{distance:>4} km: {len(bbox_ids):>7} matches | full {full_time * 1000:9.1f} ms"
+                  f" | bbox {bbox_time * 1000:9.1f} ms | x{full_time / bbox_time:.1f}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.close()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Compare a per-row Python ranking of the discovery feed with
+utils.match_scoring.rank_candidates, on synthetic candidate rows. Both sides get
+the same input, the rows of the candidate query (id, interests as JSON text,
+latitude, longitude, fame_rate), and do the same work: decode the interests,
+count common interests, compute distances, drop the rows out of range and
+return the top --top-k by (match_score DESC, id) (--top-k 0 ranks every row).
+The two results are checked to be identical. No database needed:
+    python -m benchmarks.bench_match_scoring --candidates 1000 10000 100000 --top-k 20 0
+"""
+import argparse
+import json
+import random
+import time
+from utils.geo import haversine
+from utils.match_scoring import rank_candidates
+
+INTERESTS = [
+    'gaming', 'dancing_singing', 'language', 'movie', 'book_novel', 'architecture',
+    'photography', 'fashion', 'writing', 'nature_plant', 'painting', 'football',
+    'animals', 'people_society', 'gym_fitness', 'food_drink', 'travel_places', 'art',
+]
+
+
+def python_rank(rows, interests, latitude, longitude, distance, top_k):
+    wanted = set(interests)
+    ranked = []
+    for row in rows:
+        if row['latitude'] is None or row['longitude'] is None:
+            continue
+        dist = haversine(latitude, longitude, float(row['latitude']), float(row['longitude']))
+        if dist > distance:
+            continue
+        ranked.append({
+            'id': row['id'],
+            'match_score': len(wanted.intersection(json.loads(row['interests']) if row['interests'] else ())),
+            'fame_rate': row['fame_rate'],
+            'distance_km': round(dist),
+        })
+    ranked.sort(key=lambda m: (-m['match_score'], m['id']))
+    if top_k:
+        return ranked[:top_k], len(ranked) - len(ranked[:top_k])
+    return ranked, 0
+
+
+def synthetic_rows(count):
+    """Candidate query rows, in no particular order"""
+    rows = []
+    for i in random.sample(range(1, count + 1), count):
+        located = random.random() > 0.05
+        rows.append({
+            'id': i,
+            'interests': json.dumps(random.sample(INTERESTS, random.randint(0, 6))),
+            'latitude': random.uniform(42, 51) if located else None,
+            'longitude': random.uniform(-4, 8) if located else None,
+            'fame_rate': random.randint(0, 100),
+        })
+    return rows
+
+
+def best_of(fn, repeat=5):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candidates', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--top-k', type=int, nargs='+', default=[20, 0])
+    parser.add_argument('--distance', type=int, default=400)
+    args = parser.parse_args()
+
+    interests = ['photography', 'travel_places', 'food_drink', 'art']
+    origin = (48.8566, 2.3522)
+    for count in args.candidates:
+        rows = synthetic_rows(count)
+        for top_k in args.top_k:
+            python_time, expected = best_of(lambda: python_rank(
+                rows, interests, origin[0], origin[1], args.distance, top_k))
+            vector_time, result = best_of(lambda: rank_candidates(
+                rows, interests, origin[0], origin[1], args.distance, top_k=top_k or None))
+            assert result == expected, "rankings differ"
+            label = f"top {top_k}" if top_k else "all"
+            print(f"{count:>7} candidates, {label:>6} | python {python_time * 1000:8.1f} ms"
+                  f" | vectorized {vector_time * 1000:8.1f} ms | x{python_time / vector_time:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Chat message throughput under an offered load (default 1k and 10k messages/s),
+with each send on its own green thread like concurrent requests on one worker:
+  - direct: ConversationModel.send_message, one INSERT and one commit per message
+  - batched: the same call through utils.message_writer.MessageWriter (group commit)
+Reports the achieved rate, the latency until the commit, and failed sends (e.g.
+connection pool timeouts). Uses the throwaway fixture of bench_message_send.
+Run from backend/ against the local DB container (migrations applied):
+    python -m benchmarks.bench_message_batching --rates 1000 10000 --seconds 5
+"""
+import argparse
+import os
+import time
+
+os.environ['BACKEND_MIGRATE_ON_STARTUP'] = 'false'
+
+import eventlet
+from app import socketio
+from models.conv_model import ConversationModel
+from utils.message_writer import MessageWriter
+from benchmarks.bench_message_send import create_fixture, drop_fixture
+
+
+def offered_load(rate, seconds, conversation_id, sender_id, writer):
+    latencies = []
+    failures = [0]
+    pool = eventlet.GreenPool(size=rate * seconds)
+
+    def send(i):
+        started = time.perf_counter()
+        if ConversationModel.send_message(conversation_id, sender_id, f"message {i}", writer=writer):
+            latencies.append(time.perf_counter() - started)
+        else:
+            failures[0] += 1
+
+    total = rate * seconds
+    start = time.perf_counter()
+    for i in range(total):
+        # Keep to the schedule of `rate` messages per second
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            eventlet.sleep(delay)
+        pool.spawn_n(send, i)
+    pool.waitall()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "achieved": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else None,
+        "failed": failures[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rates', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--seconds', type=int, default=5)
+    parser.add_argument('--window-ms', type=float, default=5)
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    writer = MessageWriter(socketio, ConversationModel.insert_messages,
+                           window=args.window_ms / 1000, max_batch=args.batch_size)
+    user_ids, conversation_id = create_fixture()
+    try:
+        for rate in args.rates:
+            for name, mode_writer in (('direct', None), ('batched', writer)):
+                result = offered_load(rate, args.seconds, conversation_id, user_ids[0], mode_writer)
+                p50 = f"{result['p50_ms']:7.1f}" if result['p50_ms'] is not None else '      -'
+                p99 = f"{result['p99_ms']:7.1f}" if result['p99_ms'] is not None else '      -'
+                print(f"offered {rate:6d} msg/s | {name:7s} | achieved {result['achieved']:8.0f} msg/s"
+                      f" | p50 {p50} ms | p99 {p99} ms | failed {result['failed']}")
+        print(f"writer: {writer.stats()}")
+    finally:
+        drop_fixture(user_ids)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Messages per second a single worker can store through the send path, against the
+real schema (run the migrations first):
+  - legacy: membership check, INSERT + inbox UPDATE + commit + re-SELECT joined to
+    users, sender lookup, conversation lookup for the recipient (previous
+    ConversationController.send_message)
+  - single: ConversationModel.send_message, one SELECT and one INSERT ... RETURNING
+The membership and user caches are warm in both paths, as they are in steady state.
+Two throwaway users and their conversation are created and deleted afterwards.
+Run from backend/ with the usual BACKEND_DATABASE_* variables:
+    python -m benchmarks.bench_message_send --messages 5000
+"""
+import argparse
+import json
+import time
+import uuid
+from config.database import get_connection
+from models.conv_model import ConversationModel
+from models.user_model import UserModel
+
+
+def legacy_add_message(conversation_id, sender_id, message):
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO messages (conversation_id, sender_id, content)
+            VALUES (%s, %s, %s)
+        """, (conversation_id, sender_id, message))
+        message_id = cursor.lastrowid
+        cursor.execute("""
+            UPDATE conversations c
+            JOIN messages m ON m.id = %s
+            SET c.last_message_id = m.id,
+                c.last_message_at = m.sent_at,
+                c.last_message_preview = LEFT(m.content, 255)
+            WHERE c.id = m.conversation_id
+            AND (c.last_message_id IS NULL OR c.last_message_id < m.id)
+        """, (message_id,))
+        connection.commit()
+        cursor.execute("""
+            SELECT m.id, m.sender_id, m.content as message, m.sent_at as created_at,
+                u.firstname, u.photos
+            FROM messages m
+            JOIN users u ON m.sender_id = u.id
+            WHERE m.id = %s
+        """, (message_id,))
+        msg = cursor.fetchone()
+        return {
+            'id': msg[0],
+            'sender': {'id': msg[1], 'firstname': msg[4], 'photos': json.loads(msg[5]) if msg[5] else []},
+            'message': msg[2],
+            'created_at': msg[3].isoformat()
+        }
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def legacy_send(conversation_id, sender_id, content):
+    if not ConversationModel.is_member(sender_id, conversation_id):
+        return None
+    message = legacy_add_message(conversation_id, sender_id, content)
+    UserModel.get_by_id(sender_id)
+    ConversationModel.get_conversation_by_id(conversation_id)
+    return message
+
+
+def single_send(conversation_id, sender_id, content):
+    return ConversationModel.send_message(conversation_id, sender_id, content)
+
+
+def create_fixture():
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        tag = uuid.uuid4().hex[:10]
+        user_ids = []
+        for side in ('a', 'b'):
+            cursor.execute("""
+                INSERT INTO users (username, email, password, firstname, photos)
+                VALUES (%s, %s, 'x', %s, %s)
+            """, (f"bench_{side}_{tag}", f"bench_{side}_{tag}@example.com", f"Bench {side}",
+                  json.dumps([f"/uploads/bench_{i}.jpg" for i in range(5)])))
+            user_ids.append(cursor.lastrowid)
+        cursor.execute("INSERT INTO conversations (user1_id, user2_id) VALUES (%s, %s)", tuple(user_ids))
+        conversation_id = cursor.lastrowid
+        connection.commit()
+        return user_ids, conversation_id
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def drop_fixture(user_ids):
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        # Conversations and messages go with the users (ON DELETE CASCADE)
+        cursor.execute("DELETE FROM users WHERE id IN (%s, %s)", tuple(user_ids))
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def run(send, conversation_id, sender_id, count):
+    send(conversation_id, sender_id, "warm up")
+    start = time.perf_counter()
+    for i in range(count):
+        if not send(conversation_id, sender_id, f"message {i}"):
+            raise RuntimeError("send failed")
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=2000)
+    args = parser.parse_args()
+
+    user_ids, conversation_id = create_fixture()
+    try:
+        legacy = run(legacy_send, conversation_id, user_ids[0], args.messages)
+        single = run(single_send, conversation_id, user_ids[0], args.messages)
+        print(f"{args.messages} messages | legacy {legacy:8.0f} msg/s | single transaction {single:8.0f} msg/s"
+              f" | x{single / legacy:.2f}")
+    finally:
+        drop_fixture(user_ids)
+
+
+if __name__ == '__main__':
+    main()
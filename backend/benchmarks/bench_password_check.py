@@ -0,0 +1,88 @@
+"""
+Compare the substring-probing English word check previously used at registration
+with the compiled word automaton of utils.word_automaton.
+Uses the nltk words corpus when installed, or a word list given with --words:
+    python -m benchmarks.bench_password_check --words /usr/share/dict/words
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+from utils.word_automaton import MIN_WORD_LENGTH, WordAutomaton, build, nltk_words
+
+
+def legacy_contains_english_word(words, password):
+    pw = password.lower()
+    n = len(pw)
+    for i in range(n):
+        for j in range(i + MIN_WORD_LENGTH, n + 1):
+            if pw[i:j] in words:
+                return True
+    return False
+
+
+def synthetic_passwords(count, words):
+    """Mix of passwords with and without an embedded word, 8-32 characters"""
+    alphabet = 'bcdfghjklmnpqrstvwxz' + string.digits + '@$!%*?&'
+    sample = random.sample(words, min(len(words), 1000))
+    passwords = []
+    for i in range(count):
+        length = random.randint(8, 32)
+        password = ''.join(random.choice(alphabet) for _ in range(length))
+        if i % 2:
+            word = random.choice(sample)
+            at = random.randint(0, len(password))
+            password = password[:at] + word.capitalize() + password[at:]
+        passwords.append(password)
+    return passwords
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', help="word list, one per line (default: the nltk words corpus)")
+    parser.add_argument('--passwords', type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.words:
+        with open(args.words, encoding='utf-8') as f:
+            word_list = [line.strip() for line in f if line.strip()]
+    else:
+        word_list = nltk_words()
+
+    start = time.perf_counter()
+    legacy_words = set(word.lower() for word in word_list if len(word) >= MIN_WORD_LENGTH)
+    legacy_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data = build(word_list)
+    build_time = time.perf_counter() - start
+    with tempfile.NamedTemporaryFile(suffix='.ac', delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        start = time.perf_counter()
+        automaton = WordAutomaton(path)
+        mmap_load = time.perf_counter() - start
+
+        passwords = synthetic_passwords(args.passwords, sorted(legacy_words))
+        start = time.perf_counter()
+        legacy = [legacy_contains_english_word(legacy_words, p) for p in passwords]
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled = [automaton.contains_word(p) for p in passwords]
+        compiled_time = time.perf_counter() - start
+        assert legacy == compiled, "results differ"
+
+        print(f"words: {len(word_list)}, automaton states: {automaton.states}, artifact: {len(data)} bytes"
+              f" (built offline in {build_time:.1f} s)")
+        print(f"startup  | legacy set {legacy_load * 1000:8.1f} ms | mmap artifact {mmap_load * 1000:8.3f} ms")
+        print(f"{len(passwords)} checks | legacy {legacy_time * 1000:8.1f} ms | automaton {compiled_time * 1000:8.1f} ms"
+              f" | x{legacy_time / compiled_time:.1f}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import click
+from models.user_model import UserModel
+from utils.migrations import run_migrations
+from utils.query_plans import check_query_plans
+
+
+def register_commands(app):
+    """Maintenance commands, run with `flask <command>` from the backend folder"""
+
+    @app.cli.command('db-migrate')
+    def db_migrate():
+        """Apply the pending schema migrations."""
+        applied = run_migrations()
+        if applied is None:
+            raise click.ClickException("Schema migration failed")
+        click.echo(f"Applied migrations: {', '.join(applied)}" if applied else "Schema is up to date")
+
+    @app.cli.command('db-explain-check')
+    def db_explain_check():
+        """Fail when a hot query falls back to a full table scan."""
+        failures = check_query_plans()
+        if failures is None:
+            raise click.ClickException("Could not EXPLAIN the hot queries")
+        for name, table, row in failures:
+            click.echo(f"{name}: full scan of {table} ({row['rows']} rows)", err=True)
+        if failures:
+            raise click.ClickException(f"{len(failures)} hot queries fall back to a full scan")
+        click.echo("All hot queries use an index")
+
+    @app.cli.command('rebuild-user-stats')
+    def rebuild_user_stats():
+        """Recompute the like/dislike and unread notification counters."""
+        updated = UserModel.rebuild_user_stats()
+        if updated is None:
+            raise click.ClickException("Failed to rebuild user stats")
+        click.echo(f"User stats rebuilt ({updated} rows affected)")
+
+    @app.cli.command('backfill-blocks')
+    def backfill_blocks():
+        """Copy the legacy JSON block/report arrays into user_blocks / user_reports."""
+        inserted = UserModel.backfill_blocks_and_reports()
+        if inserted is None:
+            raise click.ClickException("Failed to backfill blocks and reports")
+        click.echo(f"Blocks and reports backfilled ({inserted} rows inserted)")
+
+    @app.cli.command('backfill-profile-views')
+    def backfill_profile_views():
+        """Copy the legacy users.viewers JSON arrays into profile_views."""
+        inserted = UserModel.backfill_profile_views()
+        if inserted is None:
+            raise click.ClickException("Failed to backfill profile views")
+        click.echo(f"Profile views backfilled ({inserted} rows inserted)")
@@ -1,4 +1,10 @@
 import os
+import time
+import logging
+import threading
+from collections import deque
+import mysql.connector
+from mysql.connector import errors
 
 db_config = {
     'user': os.getenv('BACKEND_DATABASE_NAME'),
@@ -6,4 +12,170 @@ db_config = {
     'host': os.getenv('BACKEND_DATABASE_HOST'),
     'database': os.getenv('BACKEND_DATABASE_NAME'),
     'port': int(os.getenv('BACKEND_DATABASE_PORT'))
-}
\ No newline at end of file
+}
+
+pool_config = {
+    # Maximum number of connections open at the same time
+    'size': int(os.getenv('BACKEND_DATABASE_POOL_SIZE') or 10),
+    # Seconds a request waits for a free connection before giving up
+    'max_wait': float(os.getenv('BACKEND_DATABASE_POOL_TIMEOUT') or 5),
+    # Idle connections older than this are pinged before being handed out
+    'ping_after': float(os.getenv('BACKEND_DATABASE_POOL_PING_AFTER') or 5),
+}
+
+
+class PoolExhaustedError(errors.PoolError):
+    """Raised when no connection could be borrowed within max_wait seconds"""
+
+
+class PooledConnection:
+    """
+    Thin proxy around a mysql connection borrowed from the pool.
+    close() gives the connection back to the pool instead of closing the socket,
+    so the models can keep their usual try/finally connection.close() pattern.
+    """
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise errors.OperationalError("Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.checkin(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MariaDB connections shared by every model.
+    Uses threading primitives, which become green once eventlet has monkey patched
+    the process (see app.py), so waiting for a connection never blocks the hub.
+    """
+    def __init__(self, config, size=10, max_wait=5, ping_after=5):
+        self.config = config
+        self.size = size
+        self.max_wait = max_wait
+        self.ping_after = ping_after
+        self._idle = deque()  # (connection, returned_at)
+        self._open = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+            'exhausted': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def checkout(self):
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        waited = False
+        with self._lock:
+            while True:
+                if self._idle:
+                    raw, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    raw, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['exhausted'] += 1
+                    logging.error(f"Database pool exhausted ({self.size} connections in use)")
+                    raise PoolExhaustedError(msg=f"No database connection available after {self.max_wait}s")
+                waited = True
+                self._available.wait(remaining)
+            self._stats['checkouts'] += 1
+            if waited:
+                wait_time = time.monotonic() - start
+                self._stats['waits'] += 1
+                self._stats['wait_time_total'] += wait_time
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+
+        try:
+            if raw is None:
+                raw = self._connect()
+            elif time.monotonic() - returned_at > self.ping_after and not self._is_healthy(raw):
+                self._discard(raw, count_slot=False)
+                raw = self._connect()
+        except Exception:
+            self._release_slot()
+            raise
+        return PooledConnection(self, raw)
+
+    def checkin(self, raw):
+        try:
+            # Never hand out a connection with a pending transaction: with autocommit off
+            # a plain SELECT keeps a snapshot open and the next borrower would read stale rows
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception as e:
+            logging.warning(f"Discarding broken database connection: {e}")
+            self._discard(raw)
+            return
+        with self._lock:
+            self._idle.append((raw, time.monotonic()))
+            self._available.notify()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open - len(self._idle)
+        return stats
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.config)
+        with self._lock:
+            self._stats['created'] += 1
+        return raw
+
+    def _is_healthy(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            return False
+
+    def _discard(self, raw, count_slot=True):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats['discarded'] += 1
+        if count_slot:
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._lock:
+            self._open -= 1
+            self._available.notify()
+
+
+pool = ConnectionPool(db_config, **pool_config)
+
+
+def get_connection():
+    """Borrow a connection from the shared pool; close() returns it"""
+    return pool.checkout()
@@ -1,13 +1,13 @@
 import os
 import re
 from flask import jsonify, session, url_for
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.password_hashing import hash_password, verify_password, needs_rehash
 from models.user_model import UserModel
 from itsdangerous import URLSafeTimedSerializer as Serializer
-from flask_mail import Message
-from app import app, mail 
+from app import app, email_dispatcher
 import logging
-from utils.password_utils import contains_english_word
+from utils.password_utils import contains_english_word, PasswordCheckUnavailable
+from middleware.auth_middleware import set_verification_claim
 
 s = Serializer(app.config['SECRET_KEY'])
 
@@ -31,8 +31,12 @@ class AuthController:
         if not email or not password:
             return jsonify({"message": "Email and password are required"}), 400
         user = UserModel.get_by_email(email)
-        if user and check_password_hash(user['password'], password):
+        if user and verify_password(user['password'], password):
+            if needs_rehash(user['password']):
+                # Hash parameters changed since this password was stored
+                UserModel.update_password(user['id'], hash_password(password))
             session['user_id'] = user['id']
+            set_verification_claim(user['is_email_verified'])
             UserModel.update_user_connection(user['id'])
             return jsonify({"message": "Login successful", "user": user}), 200
         return jsonify({"message": "Invalid credentials"}), 401
@@ -41,13 +45,16 @@ class AuthController:
     def register(data):
         if not data.get('name') or not data.get('email') or not data.get('password'):
             return jsonify({"message": "All fields are required"}), 400
-        hashed_password = generate_password_hash(data['password'])
         username = data['name']
         email = data['email']
         password = data['password']
 
-        if contains_english_word(password):
-            return jsonify({"message": "Password cannot contain English words"}), 400
+        try:
+            if contains_english_word(password):
+                return jsonify({"message": "Password cannot contain English words"}), 400
+        except PasswordCheckUnavailable:
+            # Registration is refused rather than accepting an unchecked password
+            return jsonify({"message": "Registration is temporarily unavailable"}), 503
 
         existing_user_email = UserModel.get_by_email(email)
         if existing_user_email:
@@ -60,26 +67,22 @@ class AuthController:
         if not AuthController.is_password_strong(password):
             return jsonify({"message": "Password must be at least 8 characters long, contain an uppercase letter, a number, and a special character"}), 400
 
-        hashed_password = generate_password_hash(password)
-        user_id = UserModel.create(username, email, hashed_password)
+        hashed_password = hash_password(password)
+        user_id = UserModel.create(username, email, hashed_password,
+                                   confirmation_email=AuthController.confirmation_email(email))
 
         if user_id:
-            AuthController.send_confirmation_email(email)
+            email_dispatcher.wake()
             return jsonify({"message": "User registered successfully!", "user_id": user_id}), 201
         return jsonify({"error": "User registration failed"}), 500
 
     @staticmethod
-    def send_confirmation_email(user_email):
+    def confirmation_email(user_email):
+        """(subject, html) of the confirmation email, sent by the email dispatcher"""
         token = AuthController.generate_confirmation_token(user_email)
         confirm_url = f'http://localhost:3000/confirm/{token}'
         html = f'<p>Click the link to confirm your email: <a href="{confirm_url}">Confirm Email</a></p>'
-        msg = Message(subject='Confirm Your Email',
-                    recipients=[user_email],
-                    html=html)
-        try:
-            return mail.send(msg)
-        except Exception as e:
-            print(f"Error sending email: {e}")
+        return 'Confirm Your Email', html
 
     @staticmethod
     def is_password_strong(password):
@@ -1,182 +1,125 @@
-from flask_socketio import join_room, send, emit
+from flask_socketio import join_room, leave_room, send
 from flask import request, jsonify, session
 from models.conv_model import ConversationModel
-from models.msg_model import MessageModel
 from models.user_model import UserModel
-from app import socketio
-from socket_manager import active_users, active_conversations
+from models.notification_model import NotificationModel
+from app import socketio, connection_state, message_writer, typing_tracker
+from utils.notify import notify_user, user_room, conversation_room
+from utils.presence import registry as presence
+from utils.cache_bus import bus as cache_bus
 import logging
-import json
-from datetime import datetime
-
-def json_serializable(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+from utils.pagination import decode_cursor, parse_limit
 
 class ConversationController:
     @staticmethod
-    @socketio.on('join')
-    def join_conversation(data):
-        try:
-            conversation_id = data.get('conversation_id')
-            if not conversation_id:
-                return {'error': 'Conversation ID is required'}
-            
-            conversations = ConversationModel.get_conversations(session['user_id'])
-            if not any(str(conv['id']) == str(conversation_id) for conv in conversations):
-                return {'error': 'Unauthorized access to conversation'}
-            
-            join_room(str(conversation_id))
-            send({
-                'type': 'join',
-                'user_id': session['user_id'],
-                'conversation_id': conversation_id,
-                'message': f"User joined conversation {conversation_id}"
-            }, to=str(conversation_id))
-            return {'status': 'success'}
-        except Exception as e:
-            logging.error(f"Error in join_conversation: {str(e)}")
-            return {'error': 'Failed to join conversation'}
+    def join_conversation(ctx, data):
+        conversation_id = data.get('conversation_id')
+        if not conversation_id:
+            return {'error': 'Conversation ID is required'}
+
+        if not ConversationModel.is_member(ctx.user_id, conversation_id):
+            return {'error': 'Unauthorized access to conversation'}
+
+        room = conversation_room(conversation_id)
+        join_room(room)
+        presence.set_conversation(ctx.sid, conversation_id)
+        typing_tracker.allow(ctx.sid, conversation_id)
+        send({
+            'type': 'join',
+            'user_id': ctx.user_id,
+            'conversation_id': conversation_id,
+            'message': f"User joined conversation {conversation_id}"
+        }, to=room)
+        return {'status': 'success'}
+
+    @staticmethod
+    def leave_conversation(ctx, data):
+        conversation_id = data.get('conversation_id')
+        if not conversation_id:
+            return {'error': 'Conversation ID is required'}
+
+        leave_room(conversation_room(conversation_id))
+        presence.set_conversation(ctx.sid, None)
+        typing_tracker.stop(ctx.user_id, conversation_id)
+        return {'status': 'success'}
 
     @staticmethod
     def list_conversations():
-        conversations = ConversationModel.get_conversations(session['user_id'])
-        return jsonify(conversations)
+        limit = parse_limit(request.args.get('limit', type=int))
+        try:
+            cursor = decode_cursor(request.args.get('cursor'), 2)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        conversations, next_cursor = ConversationModel.get_conversations_page(session['user_id'], limit=limit, cursor=cursor)
+        return jsonify({'conversations': conversations, 'next_cursor': next_cursor})
 
     @staticmethod
     def get_messages(conversation_id):
         # Verify user is part of the conversation
-        conversations = ConversationModel.get_conversations(session['user_id'])
-        if not any(str(conv['id']) == str(conversation_id) for conv in conversations):
+        if not ConversationModel.is_member(session['user_id'], conversation_id):
             return jsonify({'error': 'Unauthorized access to conversation'}), 403
-        logging.error("TEEEEEEEEST")
 
-        limit = request.args.get('limit', 50, type=int)
-        offset = request.args.get('offset', 0, type=int)
-        messages = ConversationModel.get_messages(conversation_id, limit, offset)
-        logging.error("messages: " + str(messages))
-        return jsonify(messages)
+        limit = parse_limit(request.args.get('limit', type=int), default=50)
+        before_id = request.args.get('before_id', type=int)
+        after_id = request.args.get('after_id', type=int)
+        if before_id is not None and after_id is not None:
+            return jsonify({'error': 'Use either before_id or after_id'}), 400
+        messages, senders, has_more = ConversationModel.get_messages(
+            conversation_id, limit, before_id=before_id, after_id=after_id)
+        return jsonify({'messages': messages, 'senders': senders, 'has_more': has_more})
 
     @staticmethod
     def send_message(conversation_id):
         try:
-            # Verify user is part of the conversation
-            conversations = ConversationModel.get_conversations(session['user_id'])
-            if not any(str(conv['id']) == str(conversation_id) for conv in conversations):
-                return jsonify({'error': 'Unauthorized access to conversation'}), 403
             data = request.get_json()
             if not data or 'message' not in data:
                 return jsonify({'error': 'Message content is required'}), 400
-            message = ConversationModel.add_message(conversation_id, session['user_id'], data['message'])
-            logging.error("message: " + str(message))
-            if message:
-                # Get sender info for the message
-                sender = UserModel.get_by_id(session['user_id'])
-                
-                # Prepare message data for socket emission
-                socket_message = {
+            # Authorization, insert, participants and sender summary in one transaction
+            sent = ConversationModel.send_message(conversation_id, session['user_id'], data['message'], writer=message_writer)
+            if sent is None:
+                return jsonify({'error': 'Unauthorized access to conversation'}), 403
+            if not sent:
+                return jsonify({'error': 'Failed to send message'}), 500
+            message = sent['message']
+            recipient_id = sent['recipient_id']
+
+            # Use socketio instance to emit the message to the conversation room
+            socketio.emit('new_message', {
+                'type': 'message',
+                'conversation_id': str(conversation_id),
+                'message': message
+            }, to=conversation_room(conversation_id))
+
+            # Notify the recipient unless the conversation is already open on one of its sessions
+            if presence.is_viewing(recipient_id, conversation_id):
+                logging.info(f"Recipient {recipient_id} is already active in conversation {conversation_id}, skipping notification")
+            else:
+                message_notification = NotificationModel.create(recipient_id, {
                     'type': 'message',
+                    'sender': message['sender'],
                     'conversation_id': str(conversation_id),
-                    'message': {
-                        'id': message.get('id'),
-                        'sender': {
-                            'id': sender['id'],
-                            'username': sender.get('username', ''),
-                            'firstname': sender.get('firstname', '')
-                        },
-                        'message': message.get('message', ''),
-                        'created_at': message.get('created_at')  # No need to call isoformat() as it's already a string
-                    }
-                }
-                
-                # Use socketio instance to emit the message to the conversation room
-                room = str(conversation_id)
-                socketio.emit('new_message', socket_message, room=room)
-                
-                # Find the other user in the conversation to send them a direct notification
-                # Get conversation participants
-                conversation = ConversationModel.get_conversation_by_id(conversation_id)
-                if conversation:
-                    # Determine the recipient user ID
-                    recipient_id = None
-                    if conversation.get('user1_id') == session['user_id']:
-                        recipient_id = conversation.get('user2_id')
-                    else:
-                        recipient_id = conversation.get('user1_id')
-                    
-                    if recipient_id:
-                        # Check if recipient is already active in this conversation
-                        is_recipient_active = (
-                            recipient_id in active_conversations and 
-                            active_conversations[recipient_id] == str(conversation_id)
-                        )
-                        
-                        if is_recipient_active:
-                            logging.info(f"Recipient {recipient_id} is already active in conversation {conversation_id}, skipping notification")
-                        else:
-                            # Send notification directly to recipient's room
-                            recipient_room = f"user_{recipient_id}"
-                            socketio.emit('new_notification', {
-                                'type': 'message',
-                                'sender': {
-                                    'id': sender['id'],
-                                    'firstname': sender.get('firstname', ''),
-                                    'username': sender.get('username', '')
-                                },
-                                'conversation_id': str(conversation_id),
-                                'content': message.get('message', ''),
-                                'timestamp': message.get('created_at')
-                            }, room=recipient_room)
-                            
-                            # Also try sending directly to the user's socket ID if they're active
-                            if recipient_id in active_users:
-                                sid = active_users[recipient_id]
-                                socketio.emit('new_notification', {
-                                    'type': 'message',
-                                    'sender': {
-                                        'id': sender['id'],
-                                        'firstname': sender.get('firstname', ''),
-                                        'username': sender.get('username', '')
-                                    },
-                                    'conversation_id': str(conversation_id),
-                                    'content': message.get('message', ''),
-                                    'timestamp': message.get('created_at')
-                                }, room=sid)
-                            
-                            # Also broadcast the notification to all clients as a fallback
-                            socketio.emit('broadcast_notification', {
-                                'type': 'message',
-                                'sender': {
-                                    'id': sender['id'],
-                                    'firstname': sender.get('firstname', ''),
-                                    'username': sender.get('username', '')
-                                },
-                                'conversation_id': str(conversation_id),
-                                'content': message.get('message', ''),
-                                'timestamp': message.get('created_at'),
-                                'target_user_id': recipient_id
-                            })
-                
-                # Prepare message for JSON response
-                response_message = dict(message)
-                
-                return jsonify(response_message)
-            return jsonify({'error': 'Failed to send message'}), 500
+                    'content': message['message'],
+                    'timestamp': message['created_at']
+                })
+                notify_user(recipient_id, message_notification)
+
+            return jsonify(message)
         except Exception as e:
             logging.error(f"Error in send_message: {str(e)}")
             return jsonify({'error': 'Failed to process message', 'details': str(e)}), 500
 
     @staticmethod
     def get_or_create_conversation(user_id):
-        # Verify users can chat (they matched)
-        if not UserModel.can_users_chat(session['user_id'], user_id):
+        # Verify users can chat: they matched and neither blocked the other
+        current_user_id = session['user_id']
+        if not UserModel.check_match(current_user_id, user_id):
             return jsonify({'error': 'Users must match before chatting'}), 403
+        if UserModel.is_user_blocked(current_user_id, user_id) or UserModel.is_user_blocked(user_id, current_user_id):
+            return jsonify({'error': 'Users cannot chat while one of them is blocked'}), 403
 
         conversation_id = ConversationModel.get_or_create(session['user_id'], user_id)
         if conversation_id:
-            conversations = ConversationModel.get_conversations(session['user_id'])
-            conversation = next((conv for conv in conversations if conv['id'] == conversation_id), None)
+            conversation = ConversationModel.get_conversation(conversation_id)
             return jsonify(conversation)
         return jsonify({'error': 'Failed to create conversation'}), 500
 
@@ -195,64 +138,52 @@ class ConversationController:
         return jsonify({"error": "Failed to create conversation"}), 500
 
     @staticmethod
-    @socketio.on('disconnect')
-    def handle_disconnect():
-        try:
-            # Notify all rooms this user was in about the disconnect
-            conversations = ConversationModel.get_conversations(session['user_id'])
-            for conv in conversations:
-                emit('user_status', {
-                    'type': 'status',
-                    'user_id': session['user_id'],
-                    'status': 'offline',
-                    'conversation_id': str(conv['id'])
-                }, room=str(conv['id']))
-        except Exception as e:
-            logging.error(f"Error in handle_disconnect: {str(e)}")
+    def announce_status(user_id, status):
+        """Tell the user's conversation partners, and only them, that it went online/offline"""
+        connection_state.changed(user_id, status == 'online')
+        partners = ConversationModel.get_partner_ids(user_id)
+        if partners:
+            socketio.emit('user_status', {
+                'type': 'status',
+                'user_id': int(user_id),
+                'status': status
+            }, to=[user_room(partner_id) for partner_id in partners])
 
     @staticmethod
-    @socketio.on('typing')
-    def handle_typing(data):
-        try:
-            conversation_id = data.get('conversation_id')
-            is_typing = data.get('is_typing', False)
-            
-            if not conversation_id:
-                return {'error': 'Conversation ID is required'}
-            
-            # Verify user is part of the conversation
-            conversations = ConversationModel.get_conversations(session['user_id'])
-            if not any(str(conv['id']) == str(conversation_id) for conv in conversations):
+    def handle_disconnect(ctx):
+        typing_tracker.forget_socket(ctx.sid)
+        user_id, went_offline = presence.remove_session(ctx.sid)
+        if went_offline:
+            ConversationController.announce_status(user_id, 'offline')
+
+    @staticmethod
+    def handle_typing(ctx, data):
+        conversation_id = data.get('conversation_id')
+        if not conversation_id:
+            return {'error': 'Conversation ID is required'}
+
+        # Membership is checked once per socket, then remembered by the tracker
+        if not typing_tracker.is_allowed(ctx.sid, conversation_id):
+            if not ConversationModel.is_member(ctx.user_id, conversation_id):
                 return {'error': 'Unauthorized access to conversation'}
-            
-            # Use socketio instance to emit typing status
-            socketio.emit('typing_status', {
-                'type': 'typing',
-                'user_id': session['user_id'],
-                'is_typing': is_typing,
-                'conversation_id': str(conversation_id),
-                'timestamp': datetime.now().isoformat()
-            }, room=str(conversation_id))
-            
-            return {'status': 'success'}
-        except Exception as e:
-            logging.error(f"Error in handle_typing: {str(e)}")
-            return {'error': 'Failed to update typing status'}
+            typing_tracker.allow(ctx.sid, conversation_id)
+
+        # Relayed to the room only when the state changes (or as a periodic keepalive)
+        typing_tracker.update(ctx.user_id, ctx.sid, conversation_id, bool(data.get('is_typing', False)))
+        return {'status': 'success'}
 
     @staticmethod
-    @socketio.on('connect')
-    def handle_connect():
+    def handle_connect(ctx):
+        # Personal room, see utils/notify.py
+        join_room(user_room(ctx.user_id))
+        connection_state.start()
+        typing_tracker.start()
+        cache_bus.start(socketio)
         try:
-            # Notify all rooms this user was in about the connect
-            conversations = ConversationModel.get_conversations(session['user_id'])
-            for conv in conversations:
-                emit('user_status', {
-                    'type': 'status',
-                    'user_id': session['user_id'],
-                    'status': 'online',
-                    'conversation_id': str(conv['id'])
-                }, room=str(conv['id']))
-            return {'status': 'connected'}
+            # Announced only when this is the user's first session (tab, device)
+            if presence.add_session(ctx.user_id, ctx.sid):
+                ConversationController.announce_status(ctx.user_id, 'online')
         except Exception as e:
+            # Presence is best effort, the connection is still accepted
             logging.error(f"Error in handle_connect: {str(e)}")
-            return {'error': 'Failed to handle connection'}
+        return True
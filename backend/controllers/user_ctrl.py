@@ -1,31 +1,23 @@
-from flask import jsonify, session, request, g
+from flask import jsonify, session, request, g, current_app, Response, stream_with_context
 from models.user_model import UserModel
+from models.notification_model import NotificationModel
 import json
-import os
-from werkzeug.utils import secure_filename
-import uuid
 import logging
-from app import socketio
-from socket_manager import active_users
+from utils.notify import notify_user
+from utils.image_pipeline import save_photo, InvalidImageError, MAX_UPLOAD_BYTES
 from datetime import datetime
+from utils.pagination import decode_cursor, parse_limit
+from werkzeug.exceptions import RequestEntityTooLarge
 
 class UserController:
     UPLOAD_FOLDER = './shared/uploads/usersPictures'
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
     @staticmethod
-    def allowed_file(filename):
-        return '.' in filename and \
-            filename.rsplit('.', 1)[1].lower() in UserController.ALLOWED_EXTENSIONS
-
-    @staticmethod
-    def save_uploaded_file(file, user_id):
-        filename = secure_filename(file.filename)
-        extension = filename.rsplit('.', 1)[1].lower()
-        new_filename = f"{user_id}_{uuid.uuid4().hex[:8]}.{extension}"
-        filepath = os.path.join(UserController.UPLOAD_FOLDER, new_filename)
-        file.save(filepath)
-        return f"/usersPictures/{new_filename}"
+    def save_uploaded_file(file):
+        # Decoded, stripped and resized in the image worker pool, see utils/image_pipeline.py.
+        # One byte past the limit is enough for save_photo to reject an oversized file
+        filename = save_photo(file.read(MAX_UPLOAD_BYTES + 1), UserController.UPLOAD_FOLDER)
+        return f"/usersPictures/{filename}"
 
     @staticmethod
     def get_user_profile():
@@ -74,9 +66,16 @@ class UserController:
             if request.files:
                 files = request.files.getlist('photos')
                 for file in files:
-                    if file and UserController.allowed_file(file.filename):
-                        file_path = UserController.save_uploaded_file(file, user_id)
-                        photos_paths.append(file_path)
+                    if not file:
+                        continue
+                    try:
+                        file_path = UserController.save_uploaded_file(file)
+                    except InvalidImageError as e:
+                        return jsonify({
+                            "error": "Invalid image",
+                            "details": f"{file.filename}: {str(e)}"
+                        }), 400
+                    photos_paths.append(file_path)
             if photos_paths:
                 data['photos'] = json.dumps(photos_paths)
             updated_user_id, error = UserModel.update_user(
@@ -93,7 +92,6 @@ class UserController:
                 is_first_login=data.get('is_first_login'),
                 job=data.get('job'),
                 bio=data.get('bio'),
-                viewers=data.get('viewers'),
                 city=data.get('city'),
                 suburb=data.get('suburb'),
                 latitude=data.get('latitude'),
@@ -112,6 +110,9 @@ class UserController:
                     "details": error
                 }), 400
 
+        except RequestEntityTooLarge:
+            # Over MAX_CONTENT_LENGTH, answered 413 by the app's error handler
+            raise
         except Exception as e:
             logging.error(f"Error processing request: {str(e)}")
             return jsonify({
@@ -132,14 +133,30 @@ class UserController:
             max_age = request.args.get('max_age', type=int)
             distance = request.args.get('distance', type=int)
             fame_rating = request.args.get('fame_rating', type=int)
-            matches = UserModel.get_potential_matches(
+            limit = parse_limit(request.args.get('limit', type=int))
+            try:
+                cursor = decode_cursor(request.args.get('cursor'), 2)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            feed = UserModel.potential_matches_feed(
                 current_user_id=session['user_id'],
                 min_age=min_age,
                 max_age=max_age,
                 distance=distance,
-                fame_rating=fame_rating
+                fame_rating=fame_rating,
+                limit=limit,
+                cursor=cursor
             )
-            return jsonify(matches), 200
+
+            # Stream the page card by card instead of building the whole body in memory; the
+            # feed reads its rows and gives the connection back before the first card
+            def generate():
+                yield '{"matches": ['
+                for index, match in enumerate(feed):
+                    yield (',' if index else '') + current_app.json.dumps(match)
+                yield '], "next_cursor": ' + json.dumps(feed.next_cursor) + '}'
+
+            return Response(stream_with_context(generate()), status=200, mimetype='application/json')
         except Exception as e:
             logging.error(f"Error fetching potential matches: {str(e)}")
             return jsonify({
@@ -174,13 +191,10 @@ class UserController:
                     },
                     'timestamp': UserModel.get_current_timestamp()
                 }
+                like_notification = NotificationModel.create(liked_user_id, like_notification)
                 
                 # Send like notification to the target user
-                target_room = f"user_{liked_user_id}"
-                socketio.emit('new_notification', like_notification, room=target_room)
-                if liked_user_id in active_users:
-                    sid = active_users[liked_user_id]
-                    socketio.emit('new_notification', like_notification, room=sid)
+                notify_user(liked_user_id, like_notification)
                 # If it's a match, send match notification to both users
                 if is_match:
                     # Create match notification for target user
@@ -203,34 +217,11 @@ class UserController:
                         },
                         'timestamp': UserModel.get_current_timestamp()
                     }
-                    # Send match notifications to target user
-                    socketio.emit('new_notification', target_match_notification, room=target_room)
-                    
-                    # Also try sending directly to the target user's socket ID if they're active
-                    if liked_user_id in active_users:
-                        sid = active_users[liked_user_id]
-                        socketio.emit('new_notification', target_match_notification, room=sid)
-                    # Also broadcast the match notification to all clients as a fallback for target user
-                    socketio.emit('broadcast_notification', {
-                        **target_match_notification,
-                        'target_user_id': liked_user_id
-                    })
-                    # Send match notification to current user
-                    current_room = f"user_{session['user_id']}"
-                    socketio.emit('new_notification', current_match_notification, room=current_room)
-                    # Also try sending directly to the current user's socket ID if they're active
-                    if str(session['user_id']) in active_users:
-                        current_sid = active_users[str(session['user_id'])]
-                        socketio.emit('new_notification', current_match_notification, room=current_sid)
-                    # Also broadcast the match notification to all clients as a fallback for current user
-                    socketio.emit('broadcast_notification', {
-                        **current_match_notification,
-                        'target_user_id': session['user_id']
-                    })
-                socketio.emit('broadcast_notification', {
-                    **like_notification,
-                    'target_user_id': liked_user_id
-                })
+                    target_match_notification = NotificationModel.create(liked_user_id, target_match_notification)
+                    current_match_notification = NotificationModel.create(session['user_id'], current_match_notification)
+                    # Send match notifications to both users
+                    notify_user(liked_user_id, target_match_notification)
+                    notify_user(session['user_id'], current_match_notification)
                 return jsonify({
                     "message": "Like recorded successfully",
                     "is_match": is_match
@@ -274,10 +265,10 @@ class UserController:
                 return jsonify({"message": "Unauthorized"}), 401
                 
             user_id = session['user_id']
-            potential_likers = UserModel.get_potential_matches(user_id)
+            potential_likers = UserModel.get_potential_matches(user_id, limit=5)
             
             likes_added = 0
-            for user in potential_likers[:5]:
+            for user in potential_likers:
                 try:
                     success = UserModel.create_interaction(
                         user_id=user['id'],
@@ -350,61 +341,52 @@ class UserController:
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        # Ajouter l'utilisateur actuel aux viewers du profil cible
-        current_user = UserModel.get_by_id(session['user_id'])
+        # Enregistrer la visite, seule la première visite est notifiée
+        is_first_view = False
+        if session['user_id'] != target_user_id:
+            is_first_view = UserModel.record_profile_view(session['user_id'], target_user_id)
+        current_user = UserModel.get_by_id(session['user_id']) if is_first_view else None
         if current_user:
-            viewers = user.get('viewers', [])
-            if isinstance(viewers, bytes):
-                viewers = json.loads(viewers.decode())
-            elif isinstance(viewers, str):
-                viewers = json.loads(viewers)
-            elif not isinstance(viewers, list):
-                viewers = []
-
-            # Créer un objet viewer avec les informations minimales nécessaires
-            viewer_info = {
-                "id": current_user['id'],
-                "username": current_user['username'],
-                "photo": current_user['photos'][0] if current_user.get('photos') else None
-            }
-
-            # Vérifier si l'utilisateur n'est pas déjà dans la liste des viewers
-            if not any(v.get('id') == current_user['id'] for v in viewers):
-                viewers.append(viewer_info)
-                UserModel.update_user(target_user_id, viewers=json.dumps(viewers))
+            # Send a profile view notification
+            try:
+                # Create notification data
+                view_notification = {
+                    'type': 'view',
+                    'user': {
+                        'id': current_user['id'],
+                        'firstname': current_user.get('firstname', ''),
+                        'username': current_user.get('username', '')
+                    },
+                    'timestamp': UserModel.get_current_timestamp()
+                }
+                view_notification = NotificationModel.create(target_user_id, view_notification)
                 
-                # Send a profile view notification
-                try:
-                    # Create notification data
-                    view_notification = {
-                        'type': 'view',
-                        'user': {
-                            'id': current_user['id'],
-                            'firstname': current_user.get('firstname', ''),
-                            'username': current_user.get('username', '')
-                        },
-                        'timestamp': UserModel.get_current_timestamp()
-                    }
-                    
-                    # Send view notification to the target user's room
-                    target_room = f"user_{target_user_id}"
-                    socketio.emit('new_notification', view_notification, room=target_room)
-                    logging.info(f"Notification sent to {target_user_id}")
-                    # Also try sending directly to the target user's socket ID if they're active
-                    if target_user_id in active_users:
-                        sid = active_users[target_user_id]
-                        socketio.emit('new_notification', view_notification, room=sid)
-                    
-                    # Also broadcast the notification to all clients for the target user
-                    socketio.emit('broadcast_notification', {
-                        **view_notification,
-                        'target_user_id': target_user_id
-                    })
-                except Exception as e:
-                    logging.error(f"Error sending profile view notification: {str(e)}")
+                # Send view notification to the target user
+                notify_user(target_user_id, view_notification)
+            except Exception as e:
+                logging.error(f"Error sending profile view notification: {str(e)}")
 
         return jsonify(user), 200
 
+    @staticmethod
+    def get_profile_viewers():
+        if 'user_id' not in session:
+            return jsonify({"message": "Unauthorized"}), 401
+        try:
+            limit = parse_limit(request.args.get('limit', type=int))
+            try:
+                cursor = decode_cursor(request.args.get('cursor'), 2)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            viewers, next_cursor = UserModel.get_profile_viewers(session['user_id'], limit=limit, cursor=cursor)
+            return jsonify({"viewers": viewers, "next_cursor": next_cursor}), 200
+        except Exception as e:
+            logging.error(f"Error getting profile viewers: {str(e)}")
+            return jsonify({
+                "error": "Failed to get profile viewers",
+                "details": str(e)
+            }), 400
+
     @staticmethod
     def get_matches_list():
         if 'user_id' not in session:
@@ -449,21 +431,10 @@ class UserController:
                     },
                     'timestamp': UserModel.get_current_timestamp()
                 }
+                unmatch_notification = NotificationModel.create(target_user_id, unmatch_notification)
                 
                 # Send unmatch notification to the target user
-                target_room = f"user_{target_user_id}"
-                socketio.emit('new_notification', unmatch_notification, room=target_room)
-                
-                # Also try sending directly to the user's socket ID if they're active
-                if target_user_id in active_users:
-                    sid = active_users[target_user_id]
-                    socketio.emit('new_notification', unmatch_notification, room=sid)
-                
-                # Also broadcast the notification to all clients as a fallback
-                socketio.emit('broadcast_notification', {
-                    **unmatch_notification,
-                    'target_user_id': target_user_id
-                })
+                notify_user(target_user_id, unmatch_notification)
                 
                 return jsonify({"message": "Match deleted successfully"}), 200
             else:
@@ -475,6 +446,35 @@ class UserController:
                 "details": str(e)
             }), 400
 
+    @staticmethod
+    def get_notifications():
+        if 'user_id' not in session:
+            return jsonify({"message": "Unauthorized"}), 401
+        try:
+            limit = parse_limit(request.args.get('limit', type=int))
+            try:
+                cursor = decode_cursor(request.args.get('cursor'), 1)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            notifications, next_cursor = NotificationModel.get_notifications(session['user_id'], limit=limit, cursor=cursor)
+            return jsonify({
+                "notifications": notifications,
+                "unread_count": NotificationModel.get_unread_count(session['user_id']),
+                "next_cursor": next_cursor
+            }), 200
+        except Exception as e:
+            logging.error(f"Error getting notifications: {str(e)}")
+            return jsonify({
+                "error": "Failed to get notifications",
+                "details": str(e)
+            }), 400
+
+    @staticmethod
+    def get_unread_notifications_count():
+        if 'user_id' not in session:
+            return jsonify({"message": "Unauthorized"}), 401
+        return jsonify({"unread_count": NotificationModel.get_unread_count(session['user_id'])}), 200
+
     @staticmethod
     def mark_notification_read(notification_id=None, notification_type=None):
         """Mark a notification as read"""
@@ -484,14 +484,14 @@ class UserController:
         try:
             user_id = session['user_id']
             
-            # Emit a notification_read event to the user's room
-            user_room = f"user_{user_id}"
-            
             if notification_id:
-                # Mark a specific notification as read
-                socketio.emit('notification_read', {
+                # Mark a specific notification as read (ids of notifications that were
+                # never stored are client-generated strings, nothing to persist then)
+                if str(notification_id).isdigit():
+                    NotificationModel.mark_read(user_id, notification_ids=[int(notification_id)])
+                notify_user(user_id, {
                     'notification_id': notification_id
-                }, room=user_room)
+                }, event='notification_read')
                 
                 return jsonify({
                     "message": f"Notification {notification_id} marked as read"
@@ -499,9 +499,10 @@ class UserController:
                 
             elif notification_type:
                 # Mark all notifications of a specific type as read
-                socketio.emit('notification_type_read', {
+                NotificationModel.mark_read(user_id, notification_type=notification_type)
+                notify_user(user_id, {
                     'notification_type': notification_type
-                }, room=user_room)
+                }, event='notification_type_read')
                 
                 return jsonify({
                     "message": f"All notifications of type {notification_type} marked as read"
@@ -509,7 +510,8 @@ class UserController:
                 
             else:
                 # Mark all notifications as read
-                socketio.emit('all_notifications_read', {}, room=user_room)
+                NotificationModel.mark_read(user_id)
+                notify_user(user_id, {}, event='all_notifications_read')
                 
                 return jsonify({
                     "message": "All notifications marked as read"
@@ -1,7 +1,20 @@
 from functools import wraps
 from flask import session, jsonify, request
 from models.user_model import UserModel
+import hmac
 import logging
+import os
+
+# Bump to invalidate every verification claim already issued
+VERIFICATION_CLAIM_VERSION = 1
+
+def set_verification_claim(verified):
+    """Record the email verification state of the logged-in user in the signed session cookie"""
+    session['email_verified'] = {'verified': bool(verified), 'version': VERIFICATION_CLAIM_VERSION}
+
+def has_verified_claim():
+    claim = session.get('email_verified')
+    return isinstance(claim, dict) and claim.get('version') == VERIFICATION_CLAIM_VERSION and claim.get('verified') is True
 
 def login_required(f):
     @wraps(f)
@@ -17,11 +30,33 @@ def email_verified_required(f):
         if 'user_id' not in session:
             logging.error("Authentication required")
             return jsonify({"message": "Authentication required"}), 401
-        
-        user = UserModel.get_by_id(session['user_id'])
-        if not user or not user.get('is_email_verified'):
-            logging.error(f"Email verification required for user {user}")
-            return jsonify({"message": "Email verification required"}), 403
+
+        # Verification is never revoked, so a current verified claim is enough; the
+        # database is only read for missing, stale or not-yet-verified claims
+        if not has_verified_claim():
+            user = UserModel.get_by_id(session['user_id'])
+            if not user or not user.get('is_email_verified'):
+                logging.error(f"Email verification required for user {session['user_id']}")
+                return jsonify({"message": "Email verification required"}), 403
+            set_verification_claim(True)
+        return f(*args, **kwargs)
+    return decorated_function
+
+def metrics_token_required(f):
+    """
+    Operator endpoints (runtime metrics): the request must carry
+    `Authorization: Bearer <BACKEND_METRICS_TOKEN>`. Without a configured token
+    the endpoint does not exist.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = os.getenv('BACKEND_METRICS_TOKEN')
+        if not token:
+            return jsonify({"error": "Not Found"}), 404
+        provided = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(provided.encode(), f"Bearer {token}".encode()):
+            logging.error("Invalid metrics token")
+            return jsonify({"message": "Authentication required"}), 401
         return f(*args, **kwargs)
     return decorated_function
 
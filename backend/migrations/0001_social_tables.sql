@@ -0,0 +1,67 @@
+CREATE INDEX IF NOT EXISTS idx_users_location ON users (latitude, longitude);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INT PRIMARY KEY,
+    likes_count INT NOT NULL DEFAULT 0,
+    dislikes_count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO user_stats (user_id, likes_count, dislikes_count)
+SELECT u.id,
+       COALESCE(SUM(ui.interaction_type = 'like'), 0),
+       COALESCE(SUM(ui.interaction_type = 'dislike'), 0)
+FROM users u
+LEFT JOIN user_interactions ui ON ui.target_user_id = u.id
+GROUP BY u.id;
+
+CREATE TABLE IF NOT EXISTS user_blocks (
+    blocker_id INT NOT NULL,
+    blocked_id INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (blocker_id, blocked_id),
+    INDEX idx_user_blocks_blocked (blocked_id, blocker_id),
+    FOREIGN KEY (blocker_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (blocked_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_reports (
+    reporter_id INT NOT NULL,
+    reported_id INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (reporter_id, reported_id),
+    INDEX idx_user_reports_reported (reported_id, reporter_id),
+    FOREIGN KEY (reporter_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (reported_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO user_blocks (blocker_id, blocked_id)
+SELECT jt.blocker_id, u.id
+FROM users u
+JOIN JSON_TABLE(u.is_blocked_by, '$[*]' COLUMNS (blocker_id INT PATH '$')) AS jt
+JOIN users blocker ON blocker.id = jt.blocker_id
+WHERE u.is_blocked_by IS NOT NULL;
+
+INSERT IGNORE INTO user_reports (reporter_id, reported_id)
+SELECT jt.reporter_id, u.id
+FROM users u
+JOIN JSON_TABLE(u.is_fake_account, '$[*]' COLUMNS (reporter_id INT PATH '$')) AS jt
+JOIN users reporter ON reporter.id = jt.reporter_id
+WHERE u.is_fake_account IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS profile_views (
+    viewed_id INT NOT NULL,
+    viewer_id INT NOT NULL,
+    viewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (viewed_id, viewer_id),
+    INDEX idx_profile_views_recent (viewed_id, viewed_at, viewer_id),
+    FOREIGN KEY (viewed_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (viewer_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO profile_views (viewed_id, viewer_id)
+SELECT u.id, jt.viewer_id
+FROM users u
+JOIN JSON_TABLE(u.viewers, '$[*]' COLUMNS (viewer_id INT PATH '$.id')) AS jt
+JOIN users viewer ON viewer.id = jt.viewer_id
+WHERE u.viewers IS NOT NULL;
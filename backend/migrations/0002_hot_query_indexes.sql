@@ -0,0 +1,7 @@
+CREATE INDEX IF NOT EXISTS idx_interactions_target_type ON user_interactions (target_user_id, interaction_type, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_sent ON messages (conversation_id, sent_at);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_user2 ON conversations (user2_id);
+
+CREATE INDEX IF NOT EXISTS idx_users_gender_birthdate ON users (gender, birthdate);
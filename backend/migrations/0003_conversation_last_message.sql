@@ -0,0 +1,21 @@
+ALTER TABLE conversations
+    ADD COLUMN IF NOT EXISTS last_message_id INT NULL,
+    ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMP NULL,
+    ADD COLUMN IF NOT EXISTS last_message_preview VARCHAR(255) NULL,
+    ADD COLUMN IF NOT EXISTS activity_at TIMESTAMP GENERATED ALWAYS AS (COALESCE(last_message_at, created_at)) STORED;
+
+UPDATE conversations c
+JOIN (
+    SELECT conversation_id, MAX(id) AS last_id
+    FROM messages
+    GROUP BY conversation_id
+) latest ON latest.conversation_id = c.id
+JOIN messages m ON m.id = latest.last_id
+SET c.last_message_id = m.id,
+    c.last_message_at = m.sent_at,
+    c.last_message_preview = LEFT(m.content, 255)
+WHERE c.last_message_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_conversations_user1_activity ON conversations (user1_id, activity_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_user2_activity ON conversations (user2_id, activity_at, id);
@@ -0,0 +1,9 @@
+-- Keep the inbox summary of a conversation in step with its messages inside the
+-- INSERT itself, so sending a message needs no separate UPDATE round trip
+CREATE TRIGGER IF NOT EXISTS messages_after_insert AFTER INSERT ON messages FOR EACH ROW
+    UPDATE conversations
+    SET last_message_id = NEW.id,
+        last_message_at = NEW.sent_at,
+        last_message_preview = LEFT(NEW.content, 255)
+    WHERE id = NEW.conversation_id
+    AND (last_message_id IS NULL OR last_message_id < NEW.id);
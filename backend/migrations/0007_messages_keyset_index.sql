@@ -0,0 +1,6 @@
+-- Message history is paged on id (before_id/after_id), which this index serves
+-- directly; it also backs the conversation_id foreign key, so the sent_at index
+-- of 0002 is no longer needed
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages (conversation_id, id);
+
+DROP INDEX IF EXISTS idx_messages_conversation_sent ON messages;
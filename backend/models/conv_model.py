@@ -1,14 +1,24 @@
 import mysql.connector
-from config.database import db_config
+from config.database import get_connection
 import logging
 import json
 from datetime import datetime
+from utils.pagination import encode_cursor
+from utils.cache import TTLCache, MISSING
+from utils.cache_bus import bus as cache_bus
+from utils.message_writer import MessageWriteError
+from utils.image_pipeline import photo_variant
+
+# conversation_id -> (user1_id, user2_id), or None for a conversation that does not
+# exist; invalidated on every worker through utils.cache_bus
+membership_cache = TTLCache(maxsize=10000, ttl=300)
+cache_bus.register('membership', membership_cache)
 
 class ConversationModel:
     @staticmethod
     def get_or_create(user1_id, user2_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
 
             # Check if conversation exists
@@ -27,186 +37,384 @@ class ConversationModel:
                 VALUES (LEAST(%s, %s), GREATEST(%s, %s))
             """, (user1_id, user2_id, user1_id, user2_id))
             connection.commit()
+            ConversationModel.forget_conversation(cursor.lastrowid)
             return cursor.lastrowid
 
         except mysql.connector.Error as err:
             print("Database error:", err)
             return None
         finally:
-            if cursor:
+            if 'cursor' in locals() and cursor:
                 cursor.close()
-            if connection:
+            if 'connection' in locals() and connection:
                 connection.close()
 
     @staticmethod
-    def get_conversations(user_id):
+    def conversations_page_query(user_id, limit=20, cursor=None):
+        """(sql, params) of get_conversations_page, also EXPLAINed by utils.query_plans"""
+        keyset_condition = ""
+        keyset_params = []
+        if cursor:
+            keyset_condition = "AND (activity_at < %s OR (activity_at = %s AND id < %s))"
+            keyset_params = [cursor[0], cursor[0], cursor[1]]
+        limit_clause = "LIMIT %s" if limit else ""
+        limit_params = [limit + 1] if limit else []
+
+        side_query = f"""
+            (SELECT id, user1_id, user2_id, last_message_preview, last_message_at, activity_at
+            FROM conversations
+            WHERE {{column}} = %s {keyset_condition}
+            ORDER BY activity_at DESC, id DESC
+            {limit_clause})
+        """
+        query = f"""
+            SELECT c.id, c.user1_id, c.user2_id, c.activity_at,
+                u1.firstname as user1_firstname, u1.country as user1_country, u1.photos as user1_photos,
+                u2.firstname as user2_firstname, u2.country as user2_country, u2.photos as user2_photos,
+                c.last_message_preview as last_message,
+                c.last_message_at as last_message_time
+            FROM (
+                {side_query.format(column='user1_id')}
+                UNION ALL
+                {side_query.format(column='user2_id')}
+            ) c
+            JOIN users u1 ON c.user1_id = u1.id
+            JOIN users u2 ON c.user2_id = u2.id
+            ORDER BY c.activity_at DESC, c.id DESC
+            {limit_clause}
+        """
+        side_params = [user_id] + keyset_params + limit_params
+        return query, tuple(side_params + side_params + limit_params)
+
+    @staticmethod
+    def get_conversations_page(user_id, limit=20, cursor=None):
+        """
+        Inbox of user_id, most recent activity first.
+        Each side of the conversation is read in index order on (userN_id, activity_at, id)
+        and the two sorted runs are merged, so a page costs O(limit) whatever the inbox size.
+        cursor is the (activity_at, id) of the last conversation already shown.
+        Returns (conversations, next_cursor); next_cursor is None on the last page.
+        """
         try:
-            connection = mysql.connector.connect(**db_config)
-            cursor = connection.cursor(dictionary=True)
+            connection = get_connection()
+            db_cursor = connection.cursor(dictionary=True)
+            db_cursor.execute(*ConversationModel.conversations_page_query(user_id, limit, cursor))
+            conversations = db_cursor.fetchall()
 
-            # Get all conversations with user details
-            query = """
+            next_cursor = None
+            if limit and len(conversations) > limit:
+                conversations = conversations[:limit]
+                last = conversations[-1]
+                next_cursor = encode_cursor(last['activity_at'].strftime('%Y-%m-%d %H:%M:%S'), last['id'])
+
+            formatted_conversations = [ConversationModel._format_conversation(conv) for conv in conversations]
+            return formatted_conversations, next_cursor
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in get_conversations_page: {err}")
+            return [], None
+        except Exception as e:
+            logging.error(f"Unexpected error in get_conversations_page: {e}")
+            return [], None
+        finally:
+            if 'db_cursor' in locals() and db_cursor:
+                db_cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def get_conversation(conversation_id):
+        """Inbox entry (participants and last message) of a single conversation"""
+        try:
+            connection = get_connection()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
                 SELECT c.id, c.user1_id, c.user2_id,
                     u1.firstname as user1_firstname, u1.country as user1_country, u1.photos as user1_photos,
                     u2.firstname as user2_firstname, u2.country as user2_country, u2.photos as user2_photos,
-                    (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY sent_at DESC LIMIT 1) as last_message,
-                    (SELECT sent_at FROM messages WHERE conversation_id = c.id ORDER BY sent_at DESC LIMIT 1) as last_message_time
+                    c.last_message_preview as last_message,
+                    c.last_message_at as last_message_time
                 FROM conversations c
                 JOIN users u1 ON c.user1_id = u1.id
                 JOIN users u2 ON c.user2_id = u2.id
-                WHERE c.user1_id = %s OR c.user2_id = %s
-                ORDER BY COALESCE(last_message_time, c.created_at) DESC
-            """
-            cursor.execute(query, (user_id, user_id))
-            conversations = cursor.fetchall()
-            # Format the conversations data
-            formatted_conversations = []
-            for conv in conversations:
-                # Parse JSON photos arrays and add /shared/uploads prefix
-                user1_photos = [f"/shared/uploads{photo}" for photo in (json.loads(conv['user1_photos']) if conv['user1_photos'] else [])]
-                user2_photos = [f"/shared/uploads{photo}" for photo in (json.loads(conv['user2_photos']) if conv['user2_photos'] else [])]
-                
-                # Convert datetime to ISO format string
-                last_message_time = conv['last_message_time']
-                if isinstance(last_message_time, datetime):
-                    last_message_time = last_message_time.isoformat()
-                
-                formatted_conv = {
-                    'id': conv['id'],
-                    'user1': {
-                        'id': conv['user1_id'],
-                        'firstname': conv['user1_firstname'],
-                        'country': conv['user1_country'],
-                        'photos': user1_photos
-                    },
-                    'user2': {
-                        'id': conv['user2_id'],
-                        'firstname': conv['user2_firstname'],
-                        'country': conv['user2_country'],
-                        'photos': user2_photos
-                    },
-                    'last_message': conv['last_message'],
-                    'last_message_time': last_message_time
-                }
-                formatted_conversations.append(formatted_conv)
-            return formatted_conversations
+                WHERE c.id = %s
+            """, (conversation_id,))
+            conversation = cursor.fetchone()
+            return ConversationModel._format_conversation(conversation) if conversation else None
         except mysql.connector.Error as err:
-            logging.error(f"Database error in get_conversations: {err}")
-            return []
-        except Exception as e:
-            logging.error(f"Unexpected error in get_conversations: {e}")
+            logging.error(f"Database error in get_conversation: {err}")
+            return None
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def _format_conversation(conv):
+        # Parse JSON photos arrays, add /shared/uploads prefix; inbox rows only need thumbnails
+        user1_photos = [photo_variant(f"/shared/uploads{photo}", 'thumb') for photo in (json.loads(conv['user1_photos']) if conv['user1_photos'] else [])]
+        user2_photos = [photo_variant(f"/shared/uploads{photo}", 'thumb') for photo in (json.loads(conv['user2_photos']) if conv['user2_photos'] else [])]
+
+        # Convert datetime to ISO format string
+        last_message_time = conv['last_message_time']
+        if isinstance(last_message_time, datetime):
+            last_message_time = last_message_time.isoformat()
+
+        return {
+            'id': conv['id'],
+            'user1': {
+                'id': conv['user1_id'],
+                'firstname': conv['user1_firstname'],
+                'country': conv['user1_country'],
+                'photos': user1_photos
+            },
+            'user2': {
+                'id': conv['user2_id'],
+                'firstname': conv['user2_firstname'],
+                'country': conv['user2_country'],
+                'photos': user2_photos
+            },
+            'last_message': conv['last_message'],
+            'last_message_time': last_message_time
+        }
+
+    @staticmethod
+    def get_members(conversation_id):
+        """
+        (user1_id, user2_id) of a conversation, or None when it does not exist.
+        Primary key lookup, cached per process in membership_cache.
+        """
+        members = membership_cache.get(conversation_id)
+        if members is not MISSING:
+            return members
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT user1_id, user2_id
+                FROM conversations
+                WHERE id = %s
+            """, (conversation_id,))
+            row = cursor.fetchone()
+            members = tuple(row) if row else None
+            membership_cache.set(conversation_id, members)
+            return members
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in get_members: {err}")
+            return None
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def get_partner_ids(user_id):
+        """Ids of the users user_id has a conversation with"""
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT user2_id FROM conversations WHERE user1_id = %s
+                UNION
+                SELECT user1_id FROM conversations WHERE user2_id = %s
+            """, (user_id, user_id))
+            return [row[0] for row in cursor.fetchall()]
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in get_partner_ids: {err}")
             return []
         finally:
-            if cursor:
+            if 'cursor' in locals() and cursor:
                 cursor.close()
-            if connection:
+            if 'connection' in locals() and connection:
                 connection.close()
 
     @staticmethod
-    def get_messages(conversation_id, limit=50, offset=0):
+    def is_member(user_id, conversation_id):
+        try:
+            conversation_id = int(conversation_id)
+        except (TypeError, ValueError):
+            return False
+        members = ConversationModel.get_members(conversation_id)
+        return members is not None and user_id in members
+
+    @staticmethod
+    def forget_conversation(conversation_id):
+        """Drop a conversation from the membership cache of every worker (deleted or created)"""
+        cache_bus.invalidate('membership', conversation_id)
+
+    @staticmethod
+    def messages_query(conversation_id, limit=50, before_id=None, after_id=None):
+        """(sql, params) of the page read by get_messages, also EXPLAINed by utils.query_plans"""
+        query = """
+            SELECT id, sender_id, content, sent_at
+            FROM messages
+            WHERE conversation_id = %s
+        """
+        params = [conversation_id]
+        if after_id is not None:
+            query += " AND id > %s ORDER BY id ASC LIMIT %s"
+            params.extend([after_id, limit + 1])
+        else:
+            if before_id is not None:
+                query += " AND id < %s"
+                params.append(before_id)
+            query += " ORDER BY id DESC LIMIT %s"
+            params.append(limit + 1)
+        return query, tuple(params)
+
+    @staticmethod
+    def get_messages(conversation_id, limit=50, before_id=None, after_id=None):
+        """
+        Page of a conversation's messages in chronological order, read through the
+        (conversation_id, id) index:
+          - by default the latest `limit` messages
+          - with before_id the `limit` messages preceding it (older history)
+          - with after_id the first `limit` messages following it (sync since the last seen id)
+        Senders are returned once per page, as {id: profile}, instead of with every message.
+        Returns (messages, senders, has_more); has_more tells whether more messages lie
+        further in the requested direction (older ones, or newer ones with after_id).
+        """
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT m.id, m.sender_id, m.content as message, m.sent_at as created_at,
-                    u.firstname, u.photos
-                FROM messages m
-                JOIN users u ON m.sender_id = u.id
-                WHERE m.conversation_id = %s
-                ORDER BY m.sent_at DESC
-                LIMIT %s OFFSET %s
-            """, (conversation_id, limit, offset))
-            messages = cursor.fetchall()
-            # Format the messages data
-            formatted_messages = []
-            for msg in messages:
-                # Parse photos and add /shared/uploads prefix
-                photos = [f"/shared/uploads{photo}" for photo in (json.loads(msg['photos']) if msg['photos'] else [])]
-                
-                # Convert datetime to ISO format string
-                created_at = msg['created_at']
-                if isinstance(created_at, datetime):
-                    created_at = created_at.isoformat()
-                
-                formatted_msg = {
-                    'id': msg['id'],
-                    'sender': {
-                        'id': msg['sender_id'],
-                        'firstname': msg['firstname'],
+            cursor.execute(*ConversationModel.messages_query(conversation_id, limit, before_id, after_id))
+            rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            if after_id is None:
+                rows.reverse()
+
+            senders = {}
+            sender_ids = sorted({row['sender_id'] for row in rows})
+            if sender_ids:
+                cursor.execute(f"""
+                    SELECT id, firstname, username, photos
+                    FROM users
+                    WHERE id IN ({', '.join(['%s'] * len(sender_ids))})
+                """, tuple(sender_ids))
+                for user in cursor.fetchall():
+                    # Parse photos, add /shared/uploads prefix; chat avatars only need thumbnails
+                    photos = [photo_variant(f"/shared/uploads{photo}", 'thumb') for photo in (json.loads(user['photos']) if user['photos'] else [])]
+                    senders[user['id']] = {
+                        'id': user['id'],
+                        'firstname': user['firstname'],
+                        'username': user['username'],
                         'photos': photos
-                    },
-                    'message': msg['message'],
-                    'created_at': created_at
-                }
-                formatted_messages.append(formatted_msg)
-            return formatted_messages[::-1]  # Reverse to get chronological order
+                    }
+
+            messages = [{
+                'id': row['id'],
+                'sender_id': row['sender_id'],
+                'message': row['content'],
+                'created_at': row['sent_at'].isoformat() if isinstance(row['sent_at'], datetime) else row['sent_at']
+            } for row in rows]
+            return messages, senders, has_more
         except mysql.connector.Error as err:
             logging.error(f"Database error in get_messages: {err}")
-            return []
-        except Exception as e:
-            logging.error(f"Unexpected error in get_messages: {e}")
-            return []
+            return [], {}, False
         finally:
-            if cursor:
+            if 'cursor' in locals() and cursor:
                 cursor.close()
-            if connection:
+            if 'connection' in locals() and connection:
                 connection.close()
 
     @staticmethod
-    def add_message(conversation_id, sender_id, message):
+    def send_message(conversation_id, sender_id, content, writer=None):
+        """
+        Authorize and store a message in one transaction of two statements: the
+        membership check also reads the participants and the sender summary, and
+        the INSERT returns the new row. The inbox summary on conversations is kept
+        by the messages_after_insert trigger (migration 0006).
+        With a writer (utils.message_writer.MessageWriter) the INSERT is handed to its
+        batches instead, and this call returns once the batch is committed.
+        Returns {'message': ..., 'recipient_id': ...}, None when sender_id is not a
+        member of the conversation, or False on a database error.
+        """
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             cursor.execute("""
-                INSERT INTO messages (conversation_id, sender_id, content)
-                VALUES (%s, %s, %s)
-            """, (conversation_id, sender_id, message))
-            connection.commit()
-            message_id = cursor.lastrowid
-            # Get the complete message data
-            cursor.execute("""
-                SELECT m.id, m.sender_id, m.content as message, m.sent_at as created_at,
-                    u.firstname, u.photos
-                FROM messages m
-                JOIN users u ON m.sender_id = u.id
-                WHERE m.id = %s
-            """, (message_id,))
-            msg = cursor.fetchone()
-            if msg:
-                photos = json.loads(msg[5]) if msg[5] else []
-                # Convert datetime to ISO format string
-                created_at = msg[3]
-                if isinstance(created_at, datetime):
-                    created_at = created_at.isoformat()
-                
-                return {
-                    'id': msg[0],
+                SELECT c.user1_id, c.user2_id, u.firstname, u.username
+                FROM conversations c
+                JOIN users u ON u.id = %s
+                WHERE c.id = %s AND %s IN (c.user1_id, c.user2_id)
+            """, (sender_id, conversation_id, sender_id))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            user1_id, user2_id, firstname, username = row
+            if writer is not None:
+                # Give the connection back before waiting on the batch
+                cursor.close()
+                connection.close()
+                cursor = connection = None
+                message_id, sent_at = writer.write(conversation_id, sender_id, content)
+            else:
+                cursor.execute("""
+                    INSERT INTO messages (conversation_id, sender_id, content)
+                    VALUES (%s, %s, %s)
+                    RETURNING id, sent_at
+                """, (conversation_id, sender_id, content))
+                message_id, sent_at = cursor.fetchone()
+                connection.commit()
+            return {
+                'message': {
+                    'id': message_id,
                     'sender': {
-                        'id': msg[1],
-                        'firstname': msg[4],
-                        'photos': photos
+                        'id': sender_id,
+                        'firstname': firstname or '',
+                        'username': username or ''
                     },
-                    'message': msg[2],
-                    'created_at': created_at
-                }
-            return None
+                    'message': content,
+                    'created_at': sent_at.isoformat() if isinstance(sent_at, datetime) else sent_at
+                },
+                'recipient_id': user2_id if user1_id == sender_id else user1_id
+            }
         except mysql.connector.Error as err:
-            logging.error(f"Database error in add_message: {err}")
-            return None
-        except Exception as e:
-            logging.error(f"Unexpected error in add_message: {e}")
+            logging.error(f"Database error in send_message: {err}")
+            return False
+        except MessageWriteError as err:
+            logging.error(f"Batched write failed in send_message: {err}")
+            return False
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def insert_messages(rows):
+        """
+        Store (conversation_id, sender_id, content) rows with one multi-row INSERT
+        and a single commit. Returns the (id, sent_at) of each row in order, or None
+        on error (nothing is stored then).
+        """
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                INSERT INTO messages (conversation_id, sender_id, content)
+                VALUES {', '.join(['(%s, %s, %s)'] * len(rows))}
+                RETURNING id, sent_at
+            """, tuple(value for row in rows for value in row))
+            inserted = cursor.fetchall()
+            connection.commit()
+            return inserted
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in insert_messages: {err}")
             return None
         finally:
-            if cursor:
+            if 'cursor' in locals() and cursor:
                 cursor.close()
-            if connection:
+            if 'connection' in locals() and connection:
                 connection.close()
 
     @staticmethod
     def get_conversation_by_id(conversation_id):
         """Get a conversation by its ID"""
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
             
             # Get the conversation with basic details
@@ -234,7 +442,7 @@ class ConversationModel:
             logging.error(f"Unexpected error in get_conversation_by_id: {e}")
             return None
         finally:
-            if cursor:
+            if 'cursor' in locals() and cursor:
                 cursor.close()
-            if connection:
+            if 'connection' in locals() and connection:
                 connection.close()
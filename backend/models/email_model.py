@@ -0,0 +1,130 @@
+import mysql.connector
+from config.database import get_connection
+import logging
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 30          # seconds before the first retry, doubled after each failure
+BACKOFF_MAX = 3600
+SENDING_LEASE = 300        # a claimed email is handed out again if not settled by then
+
+class EmailOutboxModel:
+    @staticmethod
+    def add(cursor, recipient, subject, html):
+        """Queue an email with the caller's cursor, so it commits with the caller's transaction"""
+        cursor.execute("""
+            INSERT INTO email_outbox (recipient, subject, html)
+            VALUES (%s, %s, %s)
+        """, (recipient, subject, html))
+        return cursor.lastrowid
+
+    @staticmethod
+    def claim_due(batch_size=20):
+        """
+        Hand out up to batch_size emails that are due, marking them 'sending' for
+        SENDING_LEASE seconds. SKIP LOCKED lets several dispatchers share the outbox,
+        and an expired lease puts the emails of a crashed dispatcher back in play.
+        """
+        try:
+            connection = get_connection()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT id, recipient, subject, html, attempts
+                FROM email_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= CURRENT_TIMESTAMP
+                ORDER BY next_attempt_at, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (batch_size,))
+            emails = cursor.fetchall()
+            if emails:
+                placeholders = ', '.join(['%s'] * len(emails))
+                cursor.execute(f"""
+                    UPDATE email_outbox
+                    SET status = 'sending',
+                        attempts = attempts + 1,
+                        next_attempt_at = CURRENT_TIMESTAMP + INTERVAL %s SECOND
+                    WHERE id IN ({placeholders})
+                """, (SENDING_LEASE, *[email['id'] for email in emails]))
+            connection.commit()
+            for email in emails:
+                email['attempts'] += 1
+            return emails
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in claim_due: {err}")
+            return []
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def mark_sent(email_ids):
+        if not email_ids:
+            return True
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            placeholders = ', '.join(['%s'] * len(email_ids))
+            cursor.execute(f"""
+                UPDATE email_outbox
+                SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL
+                WHERE id IN ({placeholders})
+            """, tuple(email_ids))
+            connection.commit()
+            return True
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in mark_sent: {err}")
+            return False
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def mark_failed(email_id, attempts, error):
+        """Schedule a retry with exponential backoff, or give up after MAX_ATTEMPTS"""
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            if attempts >= MAX_ATTEMPTS:
+                cursor.execute("""
+                    UPDATE email_outbox
+                    SET status = 'failed', last_error = %s
+                    WHERE id = %s
+                """, (error[:1000], email_id))
+            else:
+                delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+                cursor.execute("""
+                    UPDATE email_outbox
+                    SET status = 'pending', last_error = %s,
+                        next_attempt_at = CURRENT_TIMESTAMP + INTERVAL %s SECOND
+                    WHERE id = %s
+                """, (error[:1000], delay, email_id))
+            connection.commit()
+            return True
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in mark_failed: {err}")
+            return False
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def stats():
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")
+            return {status: count for status, count in cursor.fetchall()}
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in email outbox stats: {err}")
+            return {}
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
@@ -1,11 +1,11 @@
 import mysql.connector
-from config.database import db_config
+from config.database import get_connection
 
 class MessageModel:
     @staticmethod
     def create(conversation_id, sender_id, content):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
 
             cursor.execute("""
@@ -24,7 +24,7 @@ class MessageModel:
             print("Database error:", err)
             return None
         finally:
-            if cursor:
+            if 'cursor' in locals() and cursor:
                 cursor.close()
-            if connection:
+            if 'connection' in locals() and connection:
                 connection.close()
@@ -0,0 +1,148 @@
+import mysql.connector
+from config.database import get_connection
+import logging
+import json
+from utils.pagination import encode_cursor
+
+class NotificationModel:
+    @staticmethod
+    def create(user_id, notification):
+        """
+        Store a notification for user_id and bump its unread counter.
+        notification is the dict sent over the socket ('type', 'timestamp' and the
+        type specific fields); it is returned with the stored 'id' and 'read' added,
+        or unchanged if it could not be stored.
+        """
+        payload = {key: value for key, value in notification.items() if key not in ('id', 'type', 'read')}
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT INTO notifications (user_id, type, payload)
+                VALUES (%s, %s, %s)
+            """, (user_id, notification['type'], json.dumps(payload, default=str)))
+            notification_id = cursor.lastrowid
+            cursor.execute("""
+                INSERT INTO user_stats (user_id, unread_notifications)
+                VALUES (%s, 1)
+                ON DUPLICATE KEY UPDATE unread_notifications = unread_notifications + 1
+            """, (user_id,))
+            connection.commit()
+            return {**notification, 'id': notification_id, 'read': False}
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in create notification: {err}")
+            return notification
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def get_notifications(user_id, limit=20, cursor=None):
+        """
+        Page of user_id's notifications, newest first.
+        cursor is the (id,) of the last notification already shown.
+        Returns (notifications, next_cursor); next_cursor is None on the last page.
+        """
+        try:
+            connection = get_connection()
+            db_cursor = connection.cursor(dictionary=True)
+            query = """
+                SELECT id, type, payload, is_read, created_at
+                FROM notifications
+                WHERE user_id = %s
+            """
+            params = [user_id]
+            if cursor:
+                query += " AND id < %s"
+                params.append(cursor[0])
+            query += " ORDER BY id DESC LIMIT %s"
+            params.append(limit + 1)
+            db_cursor.execute(query, tuple(params))
+            rows = db_cursor.fetchall()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]['id'])
+
+            notifications = []
+            for row in rows:
+                payload = row['payload']
+                if isinstance(payload, (bytes, bytearray)):
+                    payload = payload.decode()
+                payload = json.loads(payload) if payload else {}
+                notifications.append({
+                    **payload,
+                    'id': row['id'],
+                    'type': row['type'],
+                    'read': bool(row['is_read']),
+                    'timestamp': payload.get('timestamp') or row['created_at'].isoformat()
+                })
+            return notifications, next_cursor
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in get_notifications: {err}")
+            return [], None
+        finally:
+            if 'db_cursor' in locals() and db_cursor:
+                db_cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def get_unread_count(user_id):
+        """Unread counter maintained on user_stats, a primary key read"""
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("SELECT unread_notifications FROM user_stats WHERE user_id = %s", (user_id,))
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in get_unread_count: {err}")
+            return 0
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def mark_read(user_id, notification_ids=None, notification_type=None):
+        """
+        Mark user_id's unread notifications as read: the given ids, or every one of
+        notification_type, or all of them. The unread counter drops by the number of
+        rows actually flipped. Returns that number, or None on error.
+        """
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            query = "UPDATE notifications SET is_read = TRUE WHERE user_id = %s AND is_read = FALSE"
+            params = [user_id]
+            if notification_ids is not None:
+                if not notification_ids:
+                    return 0
+                query += f" AND id IN ({', '.join(['%s'] * len(notification_ids))})"
+                params.extend(notification_ids)
+            elif notification_type is not None:
+                query += " AND type = %s"
+                params.append(notification_type)
+            cursor.execute(query, tuple(params))
+            flipped = cursor.rowcount
+            if flipped:
+                cursor.execute("""
+                    UPDATE user_stats
+                    SET unread_notifications = GREATEST(unread_notifications - %s, 0)
+                    WHERE user_id = %s
+                """, (flipped, user_id))
+            connection.commit()
+            return flipped
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in mark_read: {err}")
+            return None
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
@@ -1,28 +1,86 @@
 import mysql.connector
-from config.database import db_config
-from flask import jsonify
+from config.database import get_connection
+from flask import jsonify, g, has_app_context
+import copy
 import logging
 import json
 import datetime
 import math
+from utils.geo import bounding_box
+from utils.match_scoring import rank_candidates, decode_interests
+from utils.pagination import encode_cursor
+from models.conv_model import ConversationModel
+from models.email_model import EmailOutboxModel
+from utils.cache import TTLCache, MISSING
+from utils.cache_bus import bus as cache_bus
+from utils.image_pipeline import photo_variant
+
+# Fame rate (0-100) computed from the user_stats row aliased `s`
+FAME_RATE_SQL = "COALESCE(ROUND(s.likes_count * 100 / NULLIF(s.likes_count + s.dislikes_count, 0)), 0)"
+
+# Decoded get_by_id records shared by every request of the process, layered under
+# the per-request identity map kept on flask.g; invalidated on every worker through
+# utils.cache_bus
+user_cache = TTLCache(maxsize=5000, ttl=30)
+cache_bus.register('user', user_cache)
+identity_map_stats = {"hits": 0, "misses": 0}
 
 class UserModel:
     @staticmethod
     def get_by_id(user_id):
+        """
+        Decoded user record, fetched at most once per request: the request identity
+        map is checked first, then the process-wide user_cache, then the database.
+        Callers get their own copy and may modify it.
+        """
+        identity_map = None
+        if has_app_context():
+            identity_map = g.setdefault('user_identity_map', {})
+            if user_id in identity_map:
+                identity_map_stats["hits"] += 1
+                return copy.deepcopy(identity_map[user_id])
+            identity_map_stats["misses"] += 1
+
+        user = user_cache.get(user_id)
+        if user is MISSING:
+            user = UserModel._load_user(user_id)
+            if user is None:
+                return None
+            user_cache.set(user_id, user)
+        if identity_map is not None:
+            identity_map[user_id] = user
+        return copy.deepcopy(user)
+
+    @staticmethod
+    def invalidate_user(user_id):
+        """Forget the cached record of user_id, on every worker, after a write to its row"""
+        # Both caches are keyed by the int id, as session['user_id'] and the routes give it
+        user_id = int(user_id)
+        cache_bus.invalidate('user', user_id)
+        if has_app_context():
+            g.get('user_identity_map', {}).pop(user_id, None)
+
+    @staticmethod
+    def cache_stats():
+        return {
+            "request": dict(identity_map_stats),
+            "process": user_cache.stats(),
+        }
+
+    @staticmethod
+    def _load_user(user_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
             cursor.execute("SELECT id, username, email, is_email_verified, firstname,\
             birthdate, country, gender, looking_for, interests, photos, match_type,\
-            job, bio, city, suburb, latitude, longitude, created_at, is_connected, latest_connection, viewers FROM users WHERE id = %s", (user_id,))
+            job, bio, city, suburb, latitude, longitude, created_at, is_connected, latest_connection FROM users WHERE id = %s", (user_id,))
             user = cursor.fetchone()
             if user:
                 if user.get('interests') and isinstance(user['interests'], bytes):
                     user['interests'] = json.loads(user['interests'].decode())
                 if user.get('photos') and isinstance(user['photos'], bytes):
                     user['photos'] = json.loads(user['photos'].decode())
-                if user.get('viewers') and isinstance(user['viewers'], bytes):
-                    user['viewers'] = json.loads(user['viewers'].decode())
                 if user.get('birthdate'):
                     user['birthdate'] = user['birthdate'].isoformat() if user['birthdate'] else None
                 if user.get('created_at'):
@@ -41,18 +99,18 @@ class UserModel:
                     user['latest_connection'] = user['latest_connection'].isoformat() if user['latest_connection'] else None
             return user
         except mysql.connector.Error as err:
-            logging.error(f"Database error in get_by_id: {err}")
+            logging.error(f"Database error in _load_user: {err}")
             return None
         finally:
-            if cursor:
+            if 'cursor' in locals() and cursor:
                 cursor.close()
-            if connection:
+            if 'connection' in locals() and connection:
                 connection.close()
 
     @staticmethod
     def get_by_nickname(username):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
             cursor.execute("SELECT id, email, password FROM users WHERE username = %s", (username,))
             user = cursor.fetchone()
@@ -70,7 +128,7 @@ class UserModel:
     @staticmethod
     def get_by_email(email):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
             cursor.execute("SELECT id, email, password, is_first_login, is_email_verified FROM users WHERE email = %s", (email,))
             user = cursor.fetchone()
@@ -85,14 +143,21 @@ class UserModel:
                 connection.close()
 
     @staticmethod
-    def create(name, email, password):
+    def create(name, email, password, confirmation_email=None):
+        """
+        Insert a new user. confirmation_email, a (subject, html) pair, is queued in
+        email_outbox within the same transaction.
+        """
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
             sql = "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)"
             cursor.execute(sql, (name, email, password))
-            connection.commit()
             user_id = cursor.lastrowid
+            if confirmation_email:
+                subject, html = confirmation_email
+                EmailOutboxModel.add(cursor, email, subject, html)
+            connection.commit()
             return user_id
         except mysql.connector.Error as err:
             print("Database error:", err)
@@ -104,9 +169,26 @@ class UserModel:
                 connection.close()
 
     @staticmethod
-    def update_user(user_id, username=None, firstname=None, birthdate=None, country=None, gender=None, looking_for=None, interests=None, photos=None, matchType=None, is_first_login=None, job=None, bio=None, viewers=None, city=None, suburb=None, latitude=None, longitude=None):
+    def update_password(user_id, password_hash):
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("UPDATE users SET password = %s WHERE id = %s", (password_hash, user_id))
+            connection.commit()
+            return cursor.rowcount > 0
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in update_password: {err}")
+            return False
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def update_user(user_id, username=None, firstname=None, birthdate=None, country=None, gender=None, looking_for=None, interests=None, photos=None, matchType=None, is_first_login=None, job=None, bio=None, city=None, suburb=None, latitude=None, longitude=None):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             if interests is not None:
                 clear_interests_sql = "UPDATE users SET interests = NULL WHERE id = %s"
@@ -155,9 +237,6 @@ class UserModel:
             if bio:
                 update_fields.append("bio = %s")
                 params.append(bio)
-            if viewers:
-                update_fields.append("viewers = %s")
-                params.append(viewers)
             if city:
                 update_fields.append("city = %s")
                 params.append(city)
@@ -176,6 +255,7 @@ class UserModel:
             params.append(user_id)
             cursor.execute(sql, tuple(params))
             connection.commit()
+            UserModel.invalidate_user(user_id)
 
             if cursor.rowcount > 0:
                 return user_id, None
@@ -200,10 +280,11 @@ class UserModel:
     @staticmethod
     def verified(user_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
             cursor.execute("UPDATE users SET is_email_verified = 1 WHERE id = %s", (user_id,))
             connection.commit()
+            UserModel.invalidate_user(user_id)
             if cursor.rowcount > 0:
                 return jsonify({"message": "Email verified"}), 200
             return jsonify({"message": "Email not verified"}), 400
@@ -219,8 +300,17 @@ class UserModel:
     @staticmethod
     def create_interaction(user_id, target_user_id, interaction_type):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
+            # Lock the previous interaction (if any) so the counters follow a like <-> dislike flip
+            cursor.execute("""
+                SELECT interaction_type
+                FROM user_interactions
+                WHERE user_id = %s AND target_user_id = %s
+                FOR UPDATE
+            """, (user_id, target_user_id))
+            previous = cursor.fetchone()
+            previous_type = previous[0] if previous else None
             query = """
                 INSERT INTO user_interactions (user_id, target_user_id, interaction_type)
                 VALUES (%s, %s, %s)
@@ -229,6 +319,13 @@ class UserModel:
                     updated_at = CURRENT_TIMESTAMP
             """
             cursor.execute(query, (user_id, target_user_id, interaction_type))
+            if previous_type != interaction_type:
+                UserModel._apply_stats_delta(
+                    cursor,
+                    target_user_id,
+                    likes=(interaction_type == 'like') - (previous_type == 'like'),
+                    dislikes=(interaction_type == 'dislike') - (previous_type == 'dislike')
+                )
             connection.commit()
             logging.info(f"Created interaction: {user_id} -> {target_user_id} ({interaction_type})")
 
@@ -256,6 +353,7 @@ class UserModel:
                     cursor.execute(conv_query, (user_id, target_user_id, user_id, target_user_id))
                     conversation_id = cursor.lastrowid
                     connection.commit()
+                    ConversationModel.forget_conversation(conversation_id)
                     logging.info(f"Created conversation {conversation_id} for match between users {user_id} and {target_user_id}")
                     
             return True
@@ -272,7 +370,7 @@ class UserModel:
     @staticmethod
     def check_match(user1_id, user2_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             query = """
                 SELECT COUNT(*) as match_count
@@ -297,27 +395,31 @@ class UserModel:
             if 'connection' in locals() and connection:
                 connection.close()
 
+    @staticmethod
+    def likes_query(user_id):
+        """(sql, params) of get_likes_for_user, also EXPLAINed by utils.query_plans"""
+        return """
+            SELECT DISTINCT u.id, u.firstname, u.country, u.photos
+            FROM users u
+            JOIN user_interactions ui ON u.id = ui.user_id
+            WHERE ui.target_user_id = %s
+            AND ui.interaction_type = 'like'
+            AND NOT EXISTS (
+                SELECT 1
+                FROM user_interactions ui2
+                WHERE ui2.user_id = %s
+                AND ui2.target_user_id = u.id
+                AND ui2.interaction_type = 'like'
+            )
+            ORDER BY ui.created_at DESC
+        """, (user_id, user_id)
+
     @staticmethod
     def get_likes_for_user(user_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
-            query = """
-                SELECT DISTINCT u.id, u.firstname, u.country, u.photos
-                FROM users u
-                JOIN user_interactions ui ON u.id = ui.user_id
-                WHERE ui.target_user_id = %s
-                AND ui.interaction_type = 'like'
-                AND NOT EXISTS (
-                    SELECT 1
-                    FROM user_interactions ui2
-                    WHERE ui2.user_id = %s
-                    AND ui2.target_user_id = u.id
-                    AND ui2.interaction_type = 'like'
-                )
-                ORDER BY ui.created_at DESC
-            """
-            cursor.execute(query, (user_id, user_id))
+            cursor.execute(*UserModel.likes_query(user_id))
             likes = cursor.fetchall()
             
             for like in likes:
@@ -341,7 +443,7 @@ class UserModel:
         Check if target_user_id has liked current_user_id
         """
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             query = """
                 SELECT COUNT(*) as like_count
@@ -370,39 +472,23 @@ class UserModel:
         Returns a dictionary with likes, dislikes, and fame_rate
         """
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
-            
-            # Get likes count
-            likes_query = """
-                SELECT COUNT(*) as count
-                FROM user_interactions
-                WHERE target_user_id = %s
-                AND interaction_type = 'like'
-            """
-            cursor.execute(likes_query, (user_id,))
-            likes_count = cursor.fetchone()[0]
-            
-            # Get dislikes count
-            dislikes_query = """
-                SELECT COUNT(*) as count
-                FROM user_interactions
-                WHERE target_user_id = %s
-                AND interaction_type = 'dislike'
-            """
-            cursor.execute(dislikes_query, (user_id,))
-            dislikes_count = cursor.fetchone()[0]
-            
-            # Calculate fame rate
-            total_interactions = likes_count + dislikes_count
-            fame_rate = 0
-            if total_interactions > 0:
-                fame_rate = round((likes_count / total_interactions) * 100)
-            
+
+            # Counters are maintained on write by create_interaction / delete_match
+            cursor.execute(f"""
+                SELECT s.likes_count, s.dislikes_count, {FAME_RATE_SQL}
+                FROM user_stats s
+                WHERE s.user_id = %s
+            """, (user_id,))
+            stats = cursor.fetchone()
+            if not stats:
+                return {"likes": 0, "dislikes": 0, "fame_rate": 0}
+
             return {
-                "likes": likes_count,
-                "dislikes": dislikes_count,
-                "fame_rate": fame_rate
+                "likes": stats[0],
+                "dislikes": stats[1],
+                "fame_rate": int(stats[2])
             }
             
         except mysql.connector.Error as err:
@@ -415,201 +501,243 @@ class UserModel:
                 connection.close()
 
     @staticmethod
-    def get_potential_matches(current_user_id, min_age=None, max_age=None, distance=None, fame_rating=None):
+    def _apply_stats_delta(cursor, user_id, likes=0, dislikes=0):
+        """Adjust the like/dislike counters of user_id inside the caller's transaction"""
+        cursor.execute("""
+            INSERT INTO user_stats (user_id, likes_count, dislikes_count)
+            VALUES (%s, GREATEST(%s, 0), GREATEST(%s, 0))
+            ON DUPLICATE KEY UPDATE
+                likes_count = GREATEST(likes_count + %s, 0),
+                dislikes_count = GREATEST(dislikes_count + %s, 0)
+        """, (user_id, likes, dislikes, likes, dislikes))
+
+    @staticmethod
+    def rebuild_user_stats():
+        """
+        Recompute every user's like/dislike counters from user_interactions and the
+        unread notification counter from notifications.
+        Reconciliation job for counters that drifted (manual SQL, restored dumps...).
+        Returns the number of affected rows, or None on error.
+        """
         try:
-            connection = mysql.connector.connect(**db_config)
-            cursor = connection.cursor(dictionary=True)
+            connection = get_connection()
+            cursor = connection.cursor()
             cursor.execute("""
-                SELECT gender, looking_for, interests, is_blocked_by, city, country, suburb, latitude, longitude
-                FROM users 
-                WHERE id = %s
-            """, (current_user_id,))
-            current_user = cursor.fetchone()
-            if not current_user:
-                logging.error("Current user not found")
-                return []
-            current_user_blocked_by = []
-            if current_user.get('is_blocked_by'):
-                if isinstance(current_user['is_blocked_by'], bytes):
-                    current_user_blocked_by = json.loads(current_user['is_blocked_by'].decode())
-                elif isinstance(current_user['is_blocked_by'], str):
-                    current_user_blocked_by = json.loads(current_user['is_blocked_by'])
-                else:
-                    current_user_blocked_by = current_user['is_blocked_by']
-            blocked_condition = ""
-            if current_user_blocked_by:
-                placeholders = ', '.join(['%s'] * len(current_user_blocked_by))
-                blocked_condition = f"AND id NOT IN ({placeholders})"
-            current_user_interests = []
-            if current_user.get('interests'):
-                if isinstance(current_user['interests'], bytes):
-                    current_user_interests = json.loads(current_user['interests'].decode())
-                elif isinstance(current_user['interests'], str):
-                    current_user_interests = json.loads(current_user['interests'])
-                else:
-                    current_user_interests = current_user['interests']
-            gender_condition = ""
-            if current_user['looking_for'] == 'male':
-                gender_condition = "AND gender = 'male'"
-            elif current_user['looking_for'] == 'female':
-                gender_condition = "AND gender = 'female'"
-            age_condition = ""
-            if min_age is not None and max_age is not None:
-                age_condition = """
-                    AND TIMESTAMPDIFF(YEAR, birthdate, CURDATE()) >= %s 
-                    AND TIMESTAMPDIFF(YEAR, birthdate, CURDATE()) <= %s
-                """
+                INSERT INTO user_stats (user_id, likes_count, dislikes_count, unread_notifications)
+                SELECT u.id,
+                       COALESCE(SUM(ui.interaction_type = 'like'), 0),
+                       COALESCE(SUM(ui.interaction_type = 'dislike'), 0),
+                       (SELECT COUNT(*) FROM notifications n WHERE n.user_id = u.id AND n.is_read = FALSE)
+                FROM users u
+                LEFT JOIN user_interactions ui ON ui.target_user_id = u.id
+                GROUP BY u.id
+                ON DUPLICATE KEY UPDATE
+                    likes_count = VALUES(likes_count),
+                    dislikes_count = VALUES(dislikes_count),
+                    unread_notifications = VALUES(unread_notifications)
+            """)
+            connection.commit()
+            return cursor.rowcount
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in rebuild_user_stats: {err}")
+            return None
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
 
-            query = f"""
-                SELECT id, username, firstname, birthdate, job, bio, photos, country, gender, interests,
-                       latitude, longitude, city, suburb
-                FROM users
-                WHERE id != %s
-                {gender_condition}
-                {age_condition}
-                AND id NOT IN (
-                    SELECT target_user_id 
-                    FROM user_interactions 
-                    WHERE user_id = %s
-                )
-                AND (is_blocked_by IS NULL OR NOT JSON_CONTAINS(is_blocked_by, %s, '$'))
-                {blocked_condition}
-            """
-            params = [current_user_id]  # For the id != %s condition
-            if min_age is not None and max_age is not None:
-                params.extend([min_age, max_age])
-            params.append(current_user_id)  # For the WHERE user_id = %s in subquery
-            params.append(json.dumps(current_user_id))  # For the JSON_CONTAINS function
-            if current_user_blocked_by:
-                params.extend(current_user_blocked_by)
-            
-            cursor.execute(query, tuple(params))
-            matches = cursor.fetchall()
-            processed_matches = []
-            for match in matches:
-                processed_match = {}
-                for key, value in match.items():
-                    if key == 'birthdate' and value:
-                        processed_match[key] = value.isoformat()
-                    elif key == 'photos' and value and isinstance(value, bytes):
-                        processed_match[key] = json.loads(value.decode())
-                    elif key == 'interests' and value:
-                        if isinstance(value, bytes):
-                            processed_match[key] = json.loads(value.decode())
-                        elif isinstance(value, str):
-                            processed_match[key] = json.loads(value)
-                        else:
-                            processed_match[key] = value
-                    else:
-                        processed_match[key] = value
-                match_score = 0
-                if processed_match.get('interests'):
-                    match_interests = processed_match['interests']
-                    common_interests = set(current_user_interests) & set(match_interests)
-                    match_score = len(common_interests)
-                processed_match['match_score'] = match_score
-                processed_matches.append(processed_match)
-
-            # Batch fetch fame ratings for all candidate users
-            candidate_ids = [m['id'] for m in processed_matches]
-            fame_data = {}
-            if candidate_ids:
-                format_strings = ','.join(['%s'] * len(candidate_ids))
-                fame_query = f'''
-                    SELECT target_user_id,
-                           SUM(interaction_type = 'like') AS likes,
-                           SUM(interaction_type = 'dislike') AS dislikes
-                    FROM user_interactions
-                    WHERE target_user_id IN ({format_strings})
-                    GROUP BY target_user_id
-                '''
-                cursor.execute(fame_query, tuple(candidate_ids))
-                for row in cursor.fetchall():
-                    total = (row['likes'] or 0) + (row['dislikes'] or 0)
-                    fame_rate = round((row['likes'] / total) * 100) if total > 0 else 0
-                    fame_data[row['target_user_id']] = fame_rate
-
-            # Filter by distance if requested and user has lat/lon
-            if distance is not None and current_user.get('latitude') and current_user.get('longitude'):
-                def haversine(lat1, lon1, lat2, lon2):
-                    from math import radians, sin, cos, sqrt, atan2
-                    R = 6371  # Earth radius in km
-                    dlat = radians(lat2 - lat1)
-                    dlon = radians(lon2 - lon1)
-                    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-                    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                    return R * c
-                user_lat = float(current_user['latitude'])
-                user_lon = float(current_user['longitude'])
-                filtered_matches = []
-                for m in processed_matches:
-                    if m.get('latitude') and m.get('longitude'):
-                        dist = haversine(user_lat, user_lon, float(m['latitude']), float(m['longitude']))
-                        m['distance_km'] = round(dist)
-                        if dist <= distance:
-                            filtered_matches.append(m)
-                processed_matches = filtered_matches
-            else:
-                # Even if not filtering, still add distance if possible
-                if current_user.get('latitude') and current_user.get('longitude'):
-                    def haversine(lat1, lon1, lat2, lon2):
-                        from math import radians, sin, cos, sqrt, atan2
-                        R = 6371  # Earth radius in km
-                        dlat = radians(lat2 - lat1)
-                        dlon = radians(lon2 - lon1)
-                        a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-                        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                        return R * c
-                    user_lat = float(current_user['latitude'])
-                    user_lon = float(current_user['longitude'])
-                    for m in processed_matches:
-                        if m.get('latitude') and m.get('longitude'):
-                            dist = haversine(user_lat, user_lon, float(m['latitude']), float(m['longitude']))
-                            m['distance_km'] = round(dist)
-
-            # Attach fame_rate to each match
-            for m in processed_matches:
-                m['fame_rate'] = fame_data.get(m['id'], 0)
-
-            # Filter by fame_rating if requested
-            if fame_rating is not None:
-                fame_rating = int(fame_rating)
-                processed_matches = [m for m in processed_matches if m.get('fame_rate', 0) <= fame_rating]
-
-            processed_matches.sort(key=lambda x: x.get('match_score', 0), reverse=True)
-            return processed_matches
-            
+    @staticmethod
+    def backfill_blocks_and_reports():
+        """
+        Copy the legacy JSON arrays (users.is_blocked_by / users.is_fake_account) into
+        user_blocks / user_reports. Idempotent, ids that no longer exist are skipped.
+        Returns the number of inserted rows, or None on error.
+        """
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            inserted = 0
+            cursor.execute("""
+                INSERT IGNORE INTO user_blocks (blocker_id, blocked_id)
+                SELECT jt.blocker_id, u.id
+                FROM users u
+                JOIN JSON_TABLE(u.is_blocked_by, '$[*]' COLUMNS (blocker_id INT PATH '$')) AS jt
+                JOIN users blocker ON blocker.id = jt.blocker_id
+                WHERE u.is_blocked_by IS NOT NULL
+            """)
+            inserted += cursor.rowcount
+            cursor.execute("""
+                INSERT IGNORE INTO user_reports (reporter_id, reported_id)
+                SELECT jt.reporter_id, u.id
+                FROM users u
+                JOIN JSON_TABLE(u.is_fake_account, '$[*]' COLUMNS (reporter_id INT PATH '$')) AS jt
+                JOIN users reporter ON reporter.id = jt.reporter_id
+                WHERE u.is_fake_account IS NOT NULL
+            """)
+            inserted += cursor.rowcount
+            connection.commit()
+            return inserted
         except mysql.connector.Error as err:
-            logging.error(f"Database error in get_potential_matches: {err}")
-            return []
+            logging.error(f"Database error in backfill_blocks_and_reports: {err}")
+            return None
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def record_profile_view(viewer_id, viewed_id):
+        """
+        Record a view of viewed_id by viewer_id in profile_views.
+        Returns True for a first view, False for a repeat view and None on error.
+        """
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            # The unique key decides which view is the first one: INSERT IGNORE inserts
+            # nothing for an existing pair, whatever rowcount convention the connection uses
+            cursor.execute("""
+                INSERT IGNORE INTO profile_views (viewed_id, viewer_id)
+                VALUES (%s, %s)
+            """, (viewed_id, viewer_id))
+            is_first_view = cursor.rowcount == 1
+            if not is_first_view:
+                cursor.execute("""
+                    UPDATE profile_views
+                    SET viewed_at = CURRENT_TIMESTAMP
+                    WHERE viewed_id = %s AND viewer_id = %s
+                """, (viewed_id, viewer_id))
+            connection.commit()
+            return is_first_view
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in record_profile_view: {err}")
+            return None
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def profile_viewers_query(user_id, limit=20, cursor=None):
+        """(sql, params) of get_profile_viewers, also EXPLAINed by utils.query_plans"""
+        query = """
+            SELECT u.id, u.username, JSON_UNQUOTE(JSON_EXTRACT(u.photos, '$[0]')) AS photo, pv.viewed_at
+            FROM profile_views pv
+            JOIN users u ON u.id = pv.viewer_id
+            WHERE pv.viewed_id = %s
+        """
+        params = [user_id]
+        if cursor:
+            query += " AND (pv.viewed_at < %s OR (pv.viewed_at = %s AND pv.viewer_id < %s))"
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        query += " ORDER BY pv.viewed_at DESC, pv.viewer_id DESC LIMIT %s"
+        params.append(limit + 1)
+        return query, tuple(params)
+
+    @staticmethod
+    def get_profile_viewers(user_id, limit=20, cursor=None):
+        """
+        Page of the users who viewed user_id's profile, most recent view first.
+        cursor is the (viewed_at, viewer_id) of the last viewer already shown.
+        Returns (viewers, next_cursor); next_cursor is None on the last page.
+        """
+        try:
+            connection = get_connection()
+            db_cursor = connection.cursor(dictionary=True)
+            db_cursor.execute(*UserModel.profile_viewers_query(user_id, limit, cursor))
+            viewers = db_cursor.fetchall()
+
+            next_cursor = None
+            if len(viewers) > limit:
+                viewers = viewers[:limit]
+                last = viewers[-1]
+                next_cursor = encode_cursor(last['viewed_at'].strftime('%Y-%m-%d %H:%M:%S'), last['id'])
+            for viewer in viewers:
+                viewer['viewed_at'] = viewer['viewed_at'].isoformat()
+            return viewers, next_cursor
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in get_profile_viewers: {err}")
+            return [], None
+        finally:
+            if 'db_cursor' in locals() and db_cursor:
+                db_cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    @staticmethod
+    def backfill_profile_views():
+        """
+        Copy the legacy users.viewers JSON arrays into profile_views.
+        Idempotent, viewers that no longer exist are skipped.
+        Returns the number of inserted rows, or None on error.
+        """
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT IGNORE INTO profile_views (viewed_id, viewer_id)
+                SELECT u.id, jt.viewer_id
+                FROM users u
+                JOIN JSON_TABLE(u.viewers, '$[*]' COLUMNS (viewer_id INT PATH '$.id')) AS jt
+                JOIN users viewer ON viewer.id = jt.viewer_id
+                WHERE u.viewers IS NOT NULL
+            """)
+            connection.commit()
+            return cursor.rowcount
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in backfill_profile_views: {err}")
+            return None
         finally:
             if 'cursor' in locals() and cursor:
                 cursor.close()
             if 'connection' in locals() and connection:
                 connection.close()
 
+    @staticmethod
+    def get_potential_matches(current_user_id, min_age=None, max_age=None, distance=None, fame_rating=None, limit=None, cursor=None):
+        return list(UserModel.potential_matches_feed(current_user_id, min_age, max_age, distance, fame_rating, limit, cursor))
+
+    @staticmethod
+    def potential_matches_feed(current_user_id, min_age=None, max_age=None, distance=None, fame_rating=None, limit=None, cursor=None):
+        """
+        Lazy discovery feed ordered by (match_score DESC, id ASC).
+        cursor is the (match_score, id) of the last card already shown; iterate the
+        returned feed to get at most `limit` matches, then read feed.next_cursor.
+        """
+        return PotentialMatchFeed(current_user_id, min_age, max_age, distance, fame_rating, limit, cursor)
+
+    @staticmethod
+    def matches_query(user_id):
+        """(sql, params) of get_matches_list, also EXPLAINed by utils.query_plans"""
+        return """
+            SELECT DISTINCT u.id, u.firstname, u.country, u.photos
+            FROM users u
+            JOIN user_interactions ui1 ON u.id = ui1.user_id
+            JOIN user_interactions ui2 ON u.id = ui2.target_user_id
+            WHERE ui1.target_user_id = %s
+            AND ui2.user_id = %s
+            AND ui1.interaction_type = 'like'
+            AND ui2.interaction_type = 'like'
+            ORDER BY ui1.created_at DESC
+        """, (user_id, user_id)
+
     @staticmethod
     def get_matches_list(user_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
-            query = """
-                SELECT DISTINCT u.id, u.firstname, u.country, u.photos
-                FROM users u
-                JOIN user_interactions ui1 ON u.id = ui1.user_id
-                JOIN user_interactions ui2 ON u.id = ui2.target_user_id
-                WHERE ui1.target_user_id = %s
-                AND ui2.user_id = %s
-                AND ui1.interaction_type = 'like'
-                AND ui2.interaction_type = 'like'
-                ORDER BY ui1.created_at DESC
-            """
-            cursor.execute(query, (user_id, user_id))
+            cursor.execute(*UserModel.matches_query(user_id))
             matches = cursor.fetchall()
             for match in matches:
-                if match.get('photos') and isinstance(match['photos'], bytes):
-                    match['photos'] = json.loads(match['photos'].decode())
-                
+                if match.get('photos') and isinstance(match['photos'], (bytes, str)):
+                    match['photos'] = json.loads(match['photos'])
+                # The matches grid shows cards, not full-size photos
+                if isinstance(match.get('photos'), list):
+                    match['photos'] = [photo_variant(photo, 'card') for photo in match['photos']]
+
             return matches
             
         except mysql.connector.Error as err:
@@ -627,8 +755,16 @@ class UserModel:
         Delete a match between two users by removing their interactions and conversation
         """
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
+
+            cursor.execute("""
+                SELECT id FROM conversations
+                WHERE (user1_id = %s AND user2_id = %s)
+                OR (user1_id = %s AND user2_id = %s)
+                FOR UPDATE
+            """, (user_id, target_user_id, target_user_id, user_id))
+            conversation_ids = [row[0] for row in cursor.fetchall()]
             
             conv_query = """
                 DELETE FROM conversations 
@@ -636,32 +772,55 @@ class UserModel:
                 OR (user1_id = %s AND user2_id = %s)
             """
             cursor.execute(conv_query, (user_id, target_user_id, target_user_id, user_id))
-            
+
+            # Lock the interactions being removed to take them off the fame counters
+            cursor.execute("""
+                SELECT target_user_id, interaction_type
+                FROM user_interactions
+                WHERE (user_id = %s AND target_user_id = %s)
+                OR (user_id = %s AND target_user_id = %s)
+                FOR UPDATE
+            """, (user_id, target_user_id, target_user_id, user_id))
+            removed = cursor.fetchall()
+
             interaction_query = """
                 DELETE FROM user_interactions 
                 WHERE (user_id = %s AND target_user_id = %s) 
                 OR (user_id = %s AND target_user_id = %s)
             """
             cursor.execute(interaction_query, (user_id, target_user_id, target_user_id, user_id))
+            for removed_target_id, removed_type in removed:
+                UserModel._apply_stats_delta(
+                    cursor,
+                    removed_target_id,
+                    likes=-(removed_type == 'like'),
+                    dislikes=-(removed_type == 'dislike')
+                )
             
             connection.commit()
+            for conversation_id in conversation_ids:
+                ConversationModel.forget_conversation(conversation_id)
             return True
             
         except mysql.connector.Error as err:
             logging.error(f"Database error in delete_match: {err}")
             return False
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
 
     @staticmethod
     def block_user(user_id, target_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
 
             query = """
-                UPDATE users
-                SET is_blocked_by = JSON_ARRAY_APPEND(COALESCE(is_blocked_by, '[]'),'$',%s)
-                WHERE id = %s
-            """     
+                INSERT IGNORE INTO user_blocks (blocker_id, blocked_id)
+                VALUES (%s, %s)
+            """
             cursor.execute(query, (user_id, target_id))
             connection.commit()
             return True 
@@ -682,19 +841,16 @@ class UserModel:
     @staticmethod
     def is_user_blocked(user_id, target_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
 
             query = """
-                SELECT JSON_CONTAINS(is_blocked_by, %s, '$')
-                FROM users
-                WHERE id = %s;
+                SELECT 1
+                FROM user_blocks
+                WHERE blocker_id = %s AND blocked_id = %s
             """
             cursor.execute(query, (user_id, target_id))
-            result = cursor.fetchone()
-            print("result:", result)
-
-            return result and result[0] == 1
+            return cursor.fetchone() is not None
         except mysql.connector.Error as err:
             logging.error(f"Database error in is_user_blocked: {err}")
             return False
@@ -708,15 +864,11 @@ class UserModel:
     @staticmethod
     def undo_block(user_id, target_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             query = """
-                UPDATE users
-                SET is_blocked_by = JSON_REMOVE(
-                    is_blocked_by, 
-                    JSON_UNQUOTE(JSON_SEARCH(is_blocked_by, 'one', %s))
-                )
-                WHERE id = %s
+                DELETE FROM user_blocks
+                WHERE blocker_id = %s AND blocked_id = %s
             """
             cursor.execute(query, (user_id, target_id))
             connection.commit()
@@ -733,12 +885,11 @@ class UserModel:
     @staticmethod
     def report_user(user_id, target_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             query = """
-                UPDATE users
-                SET is_fake_account = JSON_ARRAY_APPEND(COALESCE(is_fake_account, '[]'),'$',%s)
-                WHERE id = %s 
+                INSERT IGNORE INTO user_reports (reporter_id, reported_id)
+                VALUES (%s, %s)
             """
             cursor.execute(query, (user_id, target_id))
             connection.commit()
@@ -755,19 +906,16 @@ class UserModel:
     @staticmethod
     def is_user_reported(user_id, target_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
 
             query = """
-                SELECT JSON_CONTAINS(is_fake_account, %s, '$')
-                FROM users
-                WHERE id = %s;
+                SELECT 1
+                FROM user_reports
+                WHERE reporter_id = %s AND reported_id = %s
             """
             cursor.execute(query, (user_id, target_id))
-            result = cursor.fetchone()
-            print("result:", result)
-
-            return result and result[0] == 1
+            return cursor.fetchone() is not None
         except mysql.connector.Error as err:
             logging.error(f"Database error in is_user_reported: {err}")
             return False
@@ -780,15 +928,11 @@ class UserModel:
     @staticmethod
     def undo_report(user_id, target_id):
         try:        
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             query = """
-                UPDATE users
-                SET is_fake_account = JSON_REMOVE(
-                    is_fake_account, 
-                    JSON_UNQUOTE(JSON_SEARCH(is_fake_account, 'one', %s))
-                )
-                WHERE id = %s
+                DELETE FROM user_reports
+                WHERE reporter_id = %s AND reported_id = %s
             """
             cursor.execute(query, (user_id, target_id))
             connection.commit()
@@ -805,7 +949,7 @@ class UserModel:
     @staticmethod
     def update_user_connection(user_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             query = """
                 UPDATE users
@@ -814,6 +958,7 @@ class UserModel:
             """
             cursor.execute(query, (user_id,))
             connection.commit()
+            UserModel.invalidate_user(user_id)
             return True
         except mysql.connector.Error as err:
             logging.error(f"Database error in update_user_connection: {err}")
@@ -827,7 +972,7 @@ class UserModel:
     @staticmethod
     def update_user_latest_connection(user_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor()
             query = """
                 UPDATE users
@@ -837,6 +982,7 @@ class UserModel:
             """
             cursor.execute(query, (user_id,))
             connection.commit()
+            UserModel.invalidate_user(user_id)
             return True
         except mysql.connector.Error as err:
             logging.error(f"Database error in update_user_latest_connection: {err}")
@@ -850,18 +996,19 @@ class UserModel:
     @staticmethod
     def get_blocked_users(user_id):
         try:
-            connection = mysql.connector.connect(**db_config)
+            connection = get_connection()
             cursor = connection.cursor(dictionary=True)
 
-            # Query to find users that have the current user's ID in their is_blocked_by JSON array
+            # Users blocked by the current user
             query = """
-                SELECT id, username, firstname, birthdate, job, bio, photos, country, gender
-                FROM users
-                WHERE JSON_CONTAINS(is_blocked_by, %s, '$')
-                ORDER BY firstname
+                SELECT u.id, u.username, u.firstname, u.birthdate, u.job, u.bio, u.photos, u.country, u.gender
+                FROM user_blocks b
+                JOIN users u ON u.id = b.blocked_id
+                WHERE b.blocker_id = %s
+                ORDER BY u.firstname
             """
             
-            cursor.execute(query, (json.dumps(user_id),))
+            cursor.execute(query, (user_id,))
             blocked_users = cursor.fetchall()
             
             for user in blocked_users:
@@ -878,3 +1025,171 @@ class UserModel:
                 cursor.close()
             if 'connection' in locals() and connection:
                 connection.close()
+
+
+class PotentialMatchFeed:
+    """
+    Iterable page of potential matches, ordered by (match_score DESC, id) where
+    match_score counts common interests. A page costs two queries on one pooled
+    connection, released before the first card is produced: the candidate query
+    applies every SQL filter (gender, age, interactions, blocks, location box, fame)
+    and reads only the columns needed to rank, which utils.match_scoring scores and
+    selects from in one vectorized pass (top `limit` past the cursor); the profiles
+    of the selected candidates are then read by primary key.
+    next_cursor is set when more candidates follow the page and stays None once the
+    feed is exhausted.
+    """
+    # Ids per profile lookup when a page without limit is read
+    PROFILE_BATCH = 500
+
+    def __init__(self, current_user_id, min_age=None, max_age=None, distance=None, fame_rating=None, limit=None, cursor=None):
+        self.current_user_id = current_user_id
+        self.min_age = min_age
+        self.max_age = max_age
+        self.distance = distance
+        self.fame_rating = fame_rating
+        self.limit = limit
+        self.position = cursor
+        self.next_cursor = None
+
+    @staticmethod
+    def _has_location(user):
+        return user.get('latitude') is not None and user.get('longitude') is not None
+
+    def build_query(self, current_user):
+        """(sql, params) of the candidate query for current_user, also EXPLAINed by utils.query_plans"""
+        gender_condition = ""
+        if current_user['looking_for'] == 'male':
+            gender_condition = "AND gender = 'male'"
+        elif current_user['looking_for'] == 'female':
+            gender_condition = "AND gender = 'female'"
+        # Ages as a birthdate range, so the users(gender, birthdate) index applies: at most
+        # max_age means born after the day max_age + 1 years ago, at least min_age means
+        # born min_age years ago or earlier
+        age_condition = ""
+        if self.min_age is not None and self.max_age is not None:
+            age_condition = """
+                AND birthdate BETWEEN CURDATE() - INTERVAL %s YEAR + INTERVAL 1 DAY
+                                  AND CURDATE() - INTERVAL %s YEAR
+            """
+        # Prefilter on the (latitude, longitude) index with the bounding box of the
+        # search circle; the exact distance is computed by rank_candidates
+        location_condition = ""
+        location_params = []
+        if self.distance is not None and self._has_location(current_user):
+            min_lat, max_lat, min_lon, max_lon = bounding_box(
+                float(current_user['latitude']), float(current_user['longitude']), self.distance)
+            location_condition = "AND latitude BETWEEN %s AND %s"
+            location_params = [min_lat, max_lat]
+            if min_lon is not None:
+                location_condition += " AND longitude BETWEEN %s AND %s"
+                location_params.extend([min_lon, max_lon])
+
+        # Fame comes from the denormalized user_stats counters, so it can be filtered in SQL
+        fame_condition = ""
+        if self.fame_rating is not None:
+            fame_condition = f"AND {FAME_RATE_SQL} <= %s"
+
+        query = f"""
+            SELECT users.id, interests, latitude, longitude, {FAME_RATE_SQL} AS fame_rate
+            FROM users
+            LEFT JOIN user_stats s ON s.user_id = users.id
+            WHERE id != %s
+            {gender_condition}
+            {age_condition}
+            AND id NOT IN (
+                SELECT target_user_id
+                FROM user_interactions
+                WHERE user_id = %s
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM user_blocks
+                WHERE blocker_id = %s AND blocked_id = users.id
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM user_blocks
+                WHERE blocker_id = users.id AND blocked_id = %s
+            )
+            {location_condition}
+            {fame_condition}
+        """
+        params = [self.current_user_id]  # For the id != %s condition
+        if self.min_age is not None and self.max_age is not None:
+            params.extend([int(self.max_age) + 1, int(self.min_age)])
+        params.append(self.current_user_id)  # For the WHERE user_id = %s in subquery
+        params.extend([self.current_user_id, self.current_user_id])  # For the user_blocks anti-joins
+        params.extend(location_params)
+        if self.fame_rating is not None:
+            params.append(int(self.fame_rating))
+        return query, tuple(params)
+
+    def _fetch(self):
+        """
+        (ranked candidates, their profiles by id, candidates left after the page), read
+        with one pooled connection held only for the page
+        """
+        try:
+            connection = get_connection()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT gender, looking_for, interests, city, country, suburb, latitude, longitude
+                FROM users
+                WHERE id = %s
+            """, (self.current_user_id,))
+            current_user = cursor.fetchone()
+            if not current_user:
+                logging.error("Current user not found")
+                return [], {}, 0
+            cursor.execute(*self.build_query(current_user))
+            has_location = self._has_location(current_user)
+            ranked, remaining = rank_candidates(
+                cursor.fetchall(),
+                decode_interests(current_user.get('interests')),
+                latitude=current_user['latitude'] if has_location else None,
+                longitude=current_user['longitude'] if has_location else None,
+                distance=self.distance,
+                after=self.position,
+                top_k=self.limit
+            )
+            profiles = {}
+            ids = [candidate['id'] for candidate in ranked]
+            for start in range(0, len(ids), self.PROFILE_BATCH):
+                batch = ids[start:start + self.PROFILE_BATCH]
+                cursor.execute(f"""
+                    SELECT id, username, firstname, birthdate, job, bio, photos, country, gender, interests,
+                           latitude, longitude, city, suburb
+                    FROM users
+                    WHERE id IN ({', '.join(['%s'] * len(batch))})
+                """, tuple(batch))
+                profiles.update((row['id'], row) for row in cursor.fetchall())
+            return ranked, profiles, remaining
+        except mysql.connector.Error as err:
+            logging.error(f"Database error in get_potential_matches: {err}")
+            return [], {}, 0
+        finally:
+            if 'cursor' in locals() and cursor:
+                cursor.close()
+            if 'connection' in locals() and connection:
+                connection.close()
+
+    def __iter__(self):
+        ranked, profiles, remaining = self._fetch()
+        for candidate in ranked:
+            profile = profiles.get(candidate['id'])
+            if profile is None:
+                # Deleted between the two queries
+                continue
+            yield {**self._format(profile), **candidate}
+        if remaining and ranked:
+            self.next_cursor = encode_cursor(ranked[-1]['match_score'], ranked[-1]['id'])
+
+    @staticmethod
+    def _format(profile):
+        formatted = dict(profile)
+        if formatted.get('birthdate'):
+            formatted['birthdate'] = formatted['birthdate'].isoformat()
+        if formatted.get('photos') and isinstance(formatted['photos'], bytes):
+            formatted['photos'] = json.loads(formatted['photos'].decode())
+        if formatted.get('interests'):
+            formatted['interests'] = decode_interests(formatted['interests'])
+        return formatted
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 from controllers.auth_ctrl import AuthController
 from controllers.user_ctrl import UserModel
-from middleware.auth_middleware import public_route, login_required
+from middleware.auth_middleware import public_route, login_required, set_verification_claim
 import logging
 
 auth_bp = Blueprint('auth_bp', __name__)
@@ -40,7 +40,10 @@ def confirm_email(token):
         logging.error(f"User: {user}")
         if not user['is_email_verified']:
             logging.error("Verifying mail")
-            return UserModel.verified(user['id'])  # Redirect to a profile page or home
+            response = UserModel.verified(user['id'])  # Redirect to a profile page or home
+            if session.get('user_id') == user['id'] and response[1] == 200:
+                set_verification_claim(True)
+            return response
         else:
             logging.error("Email verified")
             return jsonify({"message": "Email already verified"}), 400
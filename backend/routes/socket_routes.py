@@ -0,0 +1,30 @@
+from app import socketio
+from controllers.conv_ctrl import ConversationController
+from utils.socket_router import SocketRouter
+
+router = SocketRouter(socketio)
+
+# Authenticate the socket, join the personal room and register its presence
+@router.on('connect')
+def connect(ctx, auth=None):
+    return ConversationController.handle_connect(ctx)
+
+# Forget the socket, announce the user offline after its last session
+@router.on('disconnect', authenticated=False)
+def disconnect(ctx, reason=None):
+    return ConversationController.handle_disconnect(ctx)
+
+# Open a conversation: join its room and mark it as viewed
+@router.on('join')
+def join_conversation(ctx, data):
+    return ConversationController.join_conversation(ctx, data)
+
+# Close a conversation
+@router.on('leave_conversation')
+def leave_conversation(ctx, data):
+    return ConversationController.leave_conversation(ctx, data)
+
+# Typing indicator, relayed to the conversation room
+@router.on('typing')
+def typing(ctx, data):
+    return ConversationController.handle_typing(ctx, data)
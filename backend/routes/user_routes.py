@@ -23,6 +23,11 @@ def update_user_profile():
 def get_potential_matches():
     return UserController.get_potential_matches()
 
+@user_bp.route('/viewers', methods=['GET'])
+@email_verified_required
+def get_profile_viewers():
+    return UserController.get_profile_viewers()
+
 @user_bp.route('/getmatches', methods=['GET'])
 def get_matches_list():
     return UserController.get_matches_list()
@@ -59,6 +64,14 @@ def add_test_likes():
 def get_other_user_profile(user_id):
     return UserController.get_user_profile_by_id(user_id)
 
+@user_bp.route('/notifications', methods=['GET'])
+def get_notifications():
+    return UserController.get_notifications()
+
+@user_bp.route('/notifications/unread-count', methods=['GET'])
+def get_unread_notifications_count():
+    return UserController.get_unread_notifications_count()
+
 @user_bp.route('/notifications/read', methods=['POST'])
 def mark_all_notifications_read():
     return UserController.mark_notification_read()
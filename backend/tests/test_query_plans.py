@@ -0,0 +1,38 @@
+"""
+Plans of the hot queries (utils.query_plans) on the migrated schema: the
+migrations are applied to the database of the BACKEND_DATABASE_* variables (the
+mariadb service, initialized from init.sql), then every hot query is EXPLAINed.
+Skipped when no database is reachable.
+"""
+import os
+import pytest
+
+if not os.getenv('BACKEND_DATABASE_HOST') or not os.getenv('BACKEND_DATABASE_PORT'):
+    pytest.skip("BACKEND_DATABASE_* is not set", allow_module_level=True)
+
+import mysql.connector
+from config.database import get_connection
+from utils.migrations import run_migrations
+from utils.query_plans import check_query_plans, hot_queries
+
+
+@pytest.fixture(scope='module')
+def migrated_schema():
+    try:
+        get_connection().close()
+    except mysql.connector.Error as err:
+        pytest.skip(f"database not reachable: {err}")
+    assert run_migrations() is not None, "the migrations could not be applied"
+
+
+def test_hot_queries_use_an_index(migrated_schema):
+    failures = check_query_plans()
+    assert failures is not None, "the hot queries could not be EXPLAINed"
+    assert not failures, "full scans: " + ", ".join(
+        f"{name} reads {table} ({row['rows']} rows)" for name, table, row in failures)
+
+
+def test_discovery_feed_checks_the_users_table():
+    (sql, params), indexed = hot_queries()['discovery_feed']
+    assert 'users' in indexed
+    assert sql.count('%s') == len(params)
@@ -0,0 +1,143 @@
+"""
+Chat delivery across backend workers through the Socket.IO message queue. Two
+workers, A and B, are started with the command of the backend containers
+(gunicorn, one eventlet worker) and share a throwaway fakeredis queue. A message
+posted to worker A (ConversationController.send_message) must reach the
+recipient's socket connected to worker B.
+Needs the database of the BACKEND_DATABASE_* variables with the migrations
+applied and requirements-test.txt; skipped when no database is reachable.
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import pytest
+
+if not os.getenv('BACKEND_DATABASE_HOST') or not os.getenv('BACKEND_DATABASE_PORT'):
+    pytest.skip("BACKEND_DATABASE_* is not set", allow_module_level=True)
+
+os.environ.setdefault('BACKEND_MIGRATE_ON_STARTUP', 'false')
+
+import eventlet
+import mysql.connector
+import requests
+import socketio as socketio_client
+from app import app
+from middleware.auth_middleware import VERIFICATION_CLAIM_VERSION
+from benchmarks.bench_message_send import create_fixture, drop_fixture
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until(ready, process, what, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not ready():
+        # A process that could not start (import error, port in use) ends the wait
+        if process.poll() is not None:
+            raise RuntimeError(f"{what} exited")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{what} did not start")
+        eventlet.sleep(0.5)
+
+
+def accepts_connections(port):
+    try:
+        socket.create_connection(('127.0.0.1', port), timeout=2).close()
+        return True
+    except OSError:
+        return False
+
+
+def is_healthy(port):
+    try:
+        return requests.get(f"http://127.0.0.1:{port}/api/health", timeout=2).ok
+    except requests.ConnectionError:
+        return False
+
+
+def session_cookie(user_id):
+    """Session of a logged-in user whose email is verified, as the login sets it"""
+    serializer = app.session_interface.get_signing_serializer(app)
+    value = serializer.dumps({
+        'user_id': user_id,
+        'email_verified': {'verified': True, 'version': VERIFICATION_CLAIM_VERSION},
+    })
+    return f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={value}"
+
+
+@pytest.fixture(scope='module')
+def conversation():
+    try:
+        user_ids, conversation_id = create_fixture()
+    except mysql.connector.Error as err:
+        pytest.skip(f"database not reachable: {err}")
+    yield user_ids, conversation_id
+    drop_fixture(user_ids)
+
+
+@pytest.fixture(scope='module')
+def queue():
+    # The presence registry runs Lua scripts, hence fakeredis[lua]
+    port = free_port()
+    code = ("from fakeredis import TcpFakeServer; "
+            f"TcpFakeServer(('127.0.0.1', {port}), server_type='redis').serve_forever()")
+    server = subprocess.Popen([sys.executable, '-c', code])
+    try:
+        wait_until(lambda: accepts_connections(port), server, "fakeredis server")
+        yield f"redis://127.0.0.1:{port}/0"
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@pytest.fixture(scope='module')
+def workers(queue):
+    """Base URLs of workers A and B"""
+    env = dict(os.environ, BACKEND_SOCKETIO_MESSAGE_QUEUE=queue, BACKEND_MIGRATE_ON_STARTUP='false')
+    ports = [free_port(), free_port()]
+    processes = []
+    try:
+        for port in ports:
+            processes.append(subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '--worker-class', 'eventlet', '--workers', '1',
+                 '--bind', f"127.0.0.1:{port}", 'app:app'],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        for port, process in zip(ports, processes):
+            wait_until(lambda: is_healthy(port), process, f"worker on port {port}")
+        yield [f"http://127.0.0.1:{port}" for port in ports]
+    finally:
+        for process in processes:
+            # Quick shutdown, a graceful one waits for the open sockets to close
+            process.send_signal(signal.SIGINT)
+            process.wait()
+
+
+def test_message_sent_on_worker_a_reaches_socket_on_worker_b(conversation, workers):
+    (sender_id, recipient_id), conversation_id = conversation
+    worker_a, worker_b = workers
+    received = []
+    # No client.disconnect(): the workers are stopped by the fixture, and
+    # websocket-client's close handshake never times out once eventlet has patched
+    # its socket
+    client = socketio_client.Client()
+    client.on('new_message', received.append)
+    client.connect(worker_b, headers={'Cookie': session_cookie(recipient_id)}, transports=['websocket'])
+    assert client.call('join', {'conversation_id': conversation_id}, timeout=10) == {'status': 'success'}
+
+    response = requests.post(f"{worker_a}/api/conv/{conversation_id}/messages",
+                             json={'message': "backplane check"},
+                             headers={'Cookie': session_cookie(sender_id)}, timeout=10)
+    assert response.status_code == 200, response.text
+    message_id = response.json()['id']
+
+    deadline = time.monotonic() + 10
+    while not received and time.monotonic() < deadline:
+        eventlet.sleep(0.05)
+    assert [data['message']['id'] for data in received] == [message_id]
+    assert received[0]['conversation_id'] == str(conversation_id)
@@ -0,0 +1,101 @@
+"""
+Invalidation of the per-process caches (membership_cache, user_cache) across
+backend workers. An invalidation deletes the key locally and, when the workers
+share a redis:// Socket.IO message queue, is published on CHANNEL so every other
+worker deletes it too. Each worker listens from a background task; whenever it
+(re)subscribes it clears its registered caches, as messages published while it
+was disconnected are lost.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+
+CHANNEL = 'cache_invalidation'
+
+
+class CacheBus:
+    def __init__(self, url=None):
+        self.worker_id = uuid.uuid4().hex
+        self._caches = {}  # name -> TTLCache
+        self._lock = threading.Lock()
+        self._redis = None
+        if url:
+            import redis
+            self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._started = False
+        self.published = 0
+        self.received = 0
+        self.resets = 0
+
+    def register(self, name, cache):
+        self._caches[name] = cache
+
+    def invalidate(self, name, key):
+        """Drop key from the named cache on this worker and on the others"""
+        self._caches[name].delete(key)
+        if self._redis is None:
+            return
+        try:
+            self._redis.publish(CHANNEL, json.dumps({'worker': self.worker_id, 'cache': name, 'key': key}))
+            with self._lock:
+                self.published += 1
+        except Exception as e:
+            # The entry still expires with the cache's TTL on the other workers
+            logging.error(f"Error publishing cache invalidation: {str(e)}")
+
+    def start(self, socketio):
+        if self._redis is None:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        socketio.start_background_task(self._run, socketio)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "redis" if self._redis is not None else "local",
+                "running": self._started,
+                "published": self.published,
+                "received": self.received,
+                "resets": self.resets,
+            }
+
+    def _run(self, socketio):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                self._reset()
+                for message in pubsub.listen():
+                    self._apply(message['data'])
+            except Exception as e:
+                logging.error(f"Error in cache invalidation listener: {str(e)}")
+            socketio.sleep(1)
+
+    def _reset(self):
+        for cache in self._caches.values():
+            cache.clear()
+        with self._lock:
+            self.resets += 1
+
+    def _apply(self, data):
+        invalidation = json.loads(data)
+        if invalidation['worker'] == self.worker_id:
+            return
+        cache = self._caches.get(invalidation['cache'])
+        if cache is not None:
+            cache.delete(invalidation['key'])
+        with self._lock:
+            self.received += 1
+
+
+def _bus_url():
+    queue = os.getenv('BACKEND_SOCKETIO_MESSAGE_QUEUE') or ''
+    return queue if queue.startswith(('redis://', 'rediss://')) else None
+
+
+bus = CacheBus(_bus_url())
@@ -0,0 +1,91 @@
+import logging
+import threading
+from flask_mail import Message
+from models.email_model import EmailOutboxModel
+
+
+class EmailDispatcher:
+    """
+    Background task draining email_outbox: due emails are claimed in batches and
+    sent over a single SMTP connection per batch. Failures are rescheduled with
+    backoff by EmailOutboxModel.mark_failed. wake() skips the idle wait once an
+    email is queued; otherwise the outbox is polled every poll_interval seconds.
+    """
+
+    def __init__(self, app, mail, socketio, batch_size=20, poll_interval=5):
+        self.app = app
+        self.mail = mail
+        self.socketio = socketio
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._started = False
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stats(self):
+        return {
+            "running": self._started,
+            "batches": self.batches,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = self.dispatch_batch()
+            except Exception as e:
+                logging.error(f"Error in email dispatcher: {str(e)}")
+                claimed = 0
+            if claimed < self.batch_size:
+                self._wakeup.wait(self.poll_interval)
+
+    def dispatch_batch(self):
+        """Send one batch of due emails, returns the number of emails claimed"""
+        emails = EmailOutboxModel.claim_due(self.batch_size)
+        if not emails:
+            return 0
+        self.batches += 1
+        settled = set()
+        sent_ids = []
+        with self.app.app_context():
+            try:
+                with self.mail.connect() as connection:
+                    for email in emails:
+                        try:
+                            connection.send(Message(
+                                subject=email['subject'],
+                                recipients=[email['recipient']],
+                                html=email['html']
+                            ))
+                            sent_ids.append(email['id'])
+                        except Exception as e:
+                            self._fail(email, e)
+                        settled.add(email['id'])
+            except Exception as e:
+                # Connection or login failure: whatever was not settled is retried
+                for email in emails:
+                    if email['id'] not in settled:
+                        self._fail(email, e)
+        EmailOutboxModel.mark_sent(sent_ids)
+        self.sent += len(sent_ids)
+        return len(emails)
+
+    def _fail(self, email, error):
+        logging.error(f"Failed to send email {email['id']} (attempt {email['attempts']}): {str(error)}")
+        self.failed += 1
+        EmailOutboxModel.mark_failed(email['id'], email['attempts'], str(error))
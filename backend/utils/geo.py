@@ -0,0 +1,30 @@
+import math
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two (lat, lon) points"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat, lon, distance_km):
+    """
+    Smallest lat/lon rectangle containing every point within distance_km of (lat, lon).
+    Returns (min_lat, max_lat, min_lon, max_lon); the longitude bounds are None when the
+    circle reaches a pole or crosses the antimeridian, in which case only latitude can be
+    used to prefilter.
+    """
+    dlat = math.degrees(distance_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), None, None
+    dlon = math.degrees(math.asin(math.sin(distance_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lon, max_lon
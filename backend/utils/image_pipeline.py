@@ -0,0 +1,164 @@
+"""
+Processing of uploaded profile pictures. An upload is accepted only once Pillow
+has decoded it, whatever its file name says. The pixels are then re-encoded,
+without any metadata (EXIF, GPS, ICC profile...), into fixed-size variants
+named after the hash of the upload, so a URL never changes content and
+identical uploads share their files:
+  <hash>.jpg         full   JPEG, at most 1600x1600 (the path stored in users.photos)
+  <hash>_card.webp   card   WebP, at most 720x960, swipe cards and match grids
+  <hash>_thumb.webp  thumb  WebP, 160x160 crop, inbox rows and chat avatars
+Decoding and encoding run in eventlet's OS thread pool (Pillow releases the GIL
+while it resizes and encodes), at most MAX_CONCURRENT uploads at a time.
+Photos uploaded before this pipeline have no variants, photo_variant returns
+their path unchanged.
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+import uuid
+from eventlet import tpool
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Uploads processed at the same time; the others wait their turn without blocking the hub
+MAX_CONCURRENT = int(os.getenv('BACKEND_IMAGE_WORKERS') or 2)
+MAX_UPLOAD_BYTES = 15 * 1024 * 1024
+# Largest profile update request (app.config['MAX_CONTENT_LENGTH']): six photos, the
+# frontend's limit, and the form fields
+MAX_REQUEST_BYTES = 6 * MAX_UPLOAD_BYTES + 1024 * 1024
+# Checked on the header, before any pixel is decoded
+MAX_PIXELS = 40_000_000
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+
+# name -> (format, extension, box, crop to the box, quality); full is written last
+VARIANTS = {
+    'thumb': ('WEBP', 'webp', (160, 160), True, 75),
+    'card': ('WEBP', 'webp', (720, 960), False, 80),
+    'full': ('JPEG', 'jpg', (1600, 1600), False, 85),
+}
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True, 'progressive': True},
+    'WEBP': {'method': 4},
+}
+_PROCESSED_PATH = re.compile(r'([0-9a-f]{32})\.jpg$')
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+_stats_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "processed": 0,
+    "deduplicated": 0,  # uploads whose variants already existed
+    "failed": 0,        # invalid images and write errors
+    "process_time_total": 0.0,
+}
+
+
+class InvalidImageError(Exception):
+    """An upload that is not an image this pipeline accepts"""
+
+
+def variant_filename(digest, variant):
+    extension = VARIANTS[variant][1]
+    return f"{digest}.{extension}" if variant == 'full' else f"{digest}_{variant}.{extension}"
+
+
+def photo_variant(path, variant):
+    """Path of another variant of a stored photo path (any prefix), unchanged for older uploads"""
+    if not path or variant == 'full':
+        return path
+    match = _PROCESSED_PATH.search(path)
+    if not match:
+        return path
+    return path[:match.start()] + variant_filename(match.group(1), variant)
+
+
+def _decode(data):
+    """Decoded image without metadata, upright and in RGB (transparency on white)"""
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise InvalidImageError("Image file is too large")
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            if probe.format not in ACCEPTED_FORMATS:
+                raise InvalidImageError(f"Unsupported image format {probe.format}")
+            if probe.width * probe.height > MAX_PIXELS:
+                raise InvalidImageError("Image dimensions are too large")
+            probe.verify()
+        # verify() leaves the image unusable, decode it again (first frame of a GIF)
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        image = ImageOps.exif_transpose(image)
+        rgba = image.convert('RGBA')
+    except InvalidImageError:
+        raise
+    except UnidentifiedImageError:
+        raise InvalidImageError("Not a recognized image file")
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise InvalidImageError(f"Not a valid image: {str(e)}")
+    # A fresh image carries none of the upload's info (EXIF, ICC profile, comments)
+    clean = Image.new('RGB', rgba.size, (255, 255, 255))
+    clean.paste(rgba, mask=rgba.getchannel('A'))
+    return clean
+
+
+def _encode(image, variant):
+    fmt, _, box, crop, quality = VARIANTS[variant]
+    if crop:
+        resized = ImageOps.fit(image, box, Image.LANCZOS)
+    else:
+        resized = image.copy()
+        resized.thumbnail(box, Image.LANCZOS)
+    output = io.BytesIO()
+    resized.save(output, fmt, quality=quality, **SAVE_OPTIONS[fmt])
+    return output.getvalue()
+
+
+def _process(data, folder):
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    paths = {variant: os.path.join(folder, variant_filename(digest, variant)) for variant in VARIANTS}
+    if all(os.path.exists(path) for path in paths.values()):
+        return digest, False
+    image = _decode(data)
+    os.makedirs(folder, exist_ok=True)
+    for variant, path in paths.items():
+        # Written aside then renamed, a concurrent reader never sees a partial file
+        temporary = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(_encode(image, variant))
+        os.replace(temporary, path)
+    return digest, True
+
+
+def save_photo(data, folder):
+    """
+    Validate an upload and write its variants into folder, returns the file name of
+    the full variant. Raises InvalidImageError when data is not an accepted image.
+    """
+    with _stats_lock:
+        _stats["queued"] += 1
+    with _slots:
+        started_at = time.monotonic()
+        with _stats_lock:
+            _stats["queued"] -= 1
+            _stats["running"] += 1
+        created = None
+        try:
+            digest, created = tpool.execute(_process, data, folder)
+            return variant_filename(digest, 'full')
+        finally:
+            with _stats_lock:
+                _stats["running"] -= 1
+                _stats["process_time_total"] += time.monotonic() - started_at
+                if created is None:
+                    _stats["failed"] += 1
+                elif created:
+                    _stats["processed"] += 1
+                else:
+                    _stats["deduplicated"] += 1
+
+
+def stats():
+    with _stats_lock:
+        return {"max_concurrent": MAX_CONCURRENT, **_stats}
@@ -0,0 +1,111 @@
+import json
+import numpy as np
+from utils.geo import EARTH_RADIUS_KM
+
+
+def decode_interests(value):
+    """List of interests from a users.interests value (JSON text, bytes or already decoded)"""
+    if not value:
+        return []
+    if isinstance(value, bytes):
+        value = value.decode()
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def _interest_masks(values, interests):
+    """
+    One row of uint64 words per users.interests value, bit i set when it holds
+    interests[i]. The stored JSON text is searched for each encoded interest
+    instead of being decoded, which allocates nothing per row.
+    """
+    masks = np.zeros((len(values), max(1, (len(interests) + 63) // 64)), dtype=np.uint64)
+    if not interests:
+        return masks
+    texts = [
+        value if isinstance(value, str) else value.decode() if isinstance(value, bytes) else json.dumps(value or [])
+        for value in values
+    ]
+    for bit, interest in enumerate(interests):
+        needle = json.dumps(interest)
+        found = np.fromiter((needle in text for text in texts), dtype=bool, count=len(texts))
+        masks[:, bit // 64] |= found.astype(np.uint64) << np.uint64(bit % 64)
+    return masks
+
+
+def _popcount(masks):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(masks.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def _haversine(lat, lon, lats, lons):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def rank_candidates(rows, interests, latitude=None, longitude=None, distance=None, after=None, top_k=None):
+    """
+    Score and select candidates in one vectorized pass. rows are the candidate rows
+    of the feed query (id, interests, latitude, longitude, fame_rate), turned into
+    columnar arrays: ids and fame as int64, coordinates as float64 (NaN when
+    missing) and interests as bitmasks over the given `interests`.
+      - match_score is the number of common interests, the popcount of the bitmask
+      - distance_km is computed when latitude/longitude are given, and rows farther
+        than distance (or without a location) are dropped
+      - after is a (match_score, id) keyset cursor, only the rows ranked after it
+        are kept
+    Returns (ranked, remaining): the top_k best kept rows (all of them without top_k)
+    as {'id', 'match_score', 'fame_rate'[, 'distance_km']} dicts ordered by
+    (match_score DESC, id), and the number of kept rows ranked after them.
+    """
+    if not rows:
+        return [], 0
+
+    ids = np.array([row['id'] for row in rows], dtype=np.int64)
+    fame = np.array([row.get('fame_rate') or 0 for row in rows], dtype=np.int64)
+    masks = _interest_masks([row.get('interests') for row in rows], list(dict.fromkeys(interests or ())))
+    scores = _popcount(masks)
+    keep = np.ones(len(ids), dtype=bool)
+
+    distances = None
+    if latitude is not None and longitude is not None:
+        # Missing coordinates (None) become NaN
+        lats = np.array([row.get('latitude') for row in rows], dtype=np.float64)
+        lons = np.array([row.get('longitude') for row in rows], dtype=np.float64)
+        distances = _haversine(float(latitude), float(longitude), lats, lons)
+        if distance is not None:
+            # NaN (no location) compares False and is dropped
+            keep &= distances <= distance
+
+    if after is not None:
+        after_score, after_id = int(after[0]), int(after[1])
+        keep &= (scores < after_score) | ((scores == after_score) & (ids > after_id))
+
+    kept = np.flatnonzero(keep)
+    # One int64 key ascending in (match_score DESC, id): ties at the top_k boundary
+    # are settled by id, so consecutive pages neither skip nor repeat a candidate
+    span = int(ids.max()) + 1
+    keys = (scores.max() - scores[kept]) * span + ids[kept]
+    remaining = 0
+    if top_k is not None and top_k < len(kept):
+        # argpartition selects the best top_k without sorting everything
+        best = np.argpartition(keys, top_k - 1)[:top_k]
+        remaining = len(kept) - top_k
+        kept, keys = kept[best], keys[best]
+    kept = kept[np.argsort(keys, kind='stable')]
+
+    ids_out = ids[kept].tolist()
+    scores_out = scores[kept].tolist()
+    fame_out = fame[kept].tolist()
+    distances_out = np.rint(distances[kept]).tolist() if distances is not None else None
+    ranked = []
+    for position in range(len(ids_out)):
+        candidate = {'id': ids_out[position], 'match_score': scores_out[position], 'fame_rate': fame_out[position]}
+        if distances_out is not None and distances_out[position] == distances_out[position]:
+            candidate['distance_km'] = int(distances_out[position])
+        ranked.append(candidate)
+    return ranked, remaining
@@ -0,0 +1,114 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+class MessageWriteError(Exception):
+    """A message handed to MessageWriter could not be stored"""
+
+
+class MessageWriter:
+    """
+    Write-behind queue for chat messages (group commit). Senders queue their row
+    and wait on a future; a background task drains the queue every `window`
+    seconds, or as soon as `max_batch` rows are waiting, and stores the batch with
+    one multi-row INSERT and one commit. A future resolves only after that commit,
+    so the HTTP reply and the socket emit still follow a durable write, in the
+    order the rows were queued. If a batch fails, its rows are retried one by one
+    so a single bad row (e.g. a conversation deleted meanwhile) fails alone.
+    """
+
+    def __init__(self, socketio, insert, window=0.005, max_batch=200, timeout=5):
+        self.socketio = socketio
+        self.insert = insert  # rows -> [(id, sent_at), ...] or None, ConversationModel.insert_messages
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._pending = threading.Event()  # the queue is not empty
+        self._full = threading.Event()     # a whole batch is waiting
+        self._started = False
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.largest_batch = 0
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def submit(self, conversation_id, sender_id, content):
+        """Queue a message, the future resolves to its (id, sent_at)"""
+        self.start()
+        future = Future()
+        with self._lock:
+            self._queue.append(((conversation_id, sender_id, content), future))
+            self._pending.set()
+            if len(self._queue) >= self.max_batch:
+                self._full.set()
+        return future
+
+    def write(self, conversation_id, sender_id, content):
+        """Queue a message and wait for its batch to be committed, returns (id, sent_at)"""
+        future = self.submit(conversation_id, sender_id, content)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            raise MessageWriteError(f"No commit within {self.timeout} s")
+
+    def stats(self):
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            "running": self._started,
+            "queued": queued,
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+            "largest_batch": self.largest_batch,
+            "avg_batch": round(self.written / self.batches, 1) if self.batches else 0,
+        }
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            # Leave the window for more rows to join, unless a batch is already full
+            self._full.wait(self.window)
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+                if len(self._queue) < self.max_batch:
+                    self._full.clear()
+                if not self._queue:
+                    self._pending.clear()
+            try:
+                self.flush(batch)
+            except Exception as e:
+                logging.error(f"Error in message writer: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(MessageWriteError(str(e)))
+
+    def flush(self, batch):
+        rows = [row for row, _ in batch]
+        inserted = self.insert(rows)
+        if inserted is not None and len(inserted) == len(rows):
+            self.batches += 1
+            self.written += len(rows)
+            self.largest_batch = max(self.largest_batch, len(rows))
+            for (_, future), result in zip(batch, inserted):
+                future.set_result(tuple(result))
+            return
+        for row, future in batch:
+            inserted = self.insert([row])
+            if inserted:
+                self.batches += 1
+                self.written += 1
+                future.set_result(tuple(inserted[0]))
+            else:
+                self.failed += 1
+                future.set_exception(MessageWriteError("Message could not be stored"))
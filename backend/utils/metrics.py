@@ -0,0 +1,56 @@
+import threading
+
+# Upper bounds of the latency buckets, in milliseconds (the last bucket is unbounded)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LatencyHistogram:
+    """Per-name latency counts in fixed buckets, cheap enough to record on every call"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}  # name -> {"count", "total", "max", "counts"}
+
+    def observe(self, name, seconds):
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.buckets) if ms <= bound), len(self.buckets))
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = {"count": 0, "total": 0.0, "max": 0.0,
+                                               "counts": [0] * (len(self.buckets) + 1)}
+            series["count"] += 1
+            series["total"] += ms
+            series["max"] = max(series["max"], ms)
+            series["counts"][index] += 1
+
+    def _quantile(self, counts, count, q):
+        """Upper bound of the bucket holding the q quantile (None for the unbounded bucket)"""
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+    def stats(self):
+        with self._lock:
+            series = {name: {**s, "counts": list(s["counts"])} for name, s in self._series.items()}
+        labels = [f"<={bound}ms" for bound in self.buckets] + [f">{self.buckets[-1]}ms"]
+        return {
+            name: {
+                "count": s["count"],
+                "avg_ms": round(s["total"] / s["count"], 3),
+                "max_ms": round(s["max"], 3),
+                "p50_ms": self._quantile(s["counts"], s["count"], 0.5),
+                "p99_ms": self._quantile(s["counts"], s["count"], 0.99),
+                "buckets": dict(zip(labels, s["counts"])),
+            }
+            for name, s in series.items()
+        }
+
+
+# Time spent in each Socket.IO event handler, see utils/socket_router.py
+socket_event_latency = LatencyHistogram()
@@ -0,0 +1,74 @@
+import os
+import re
+import logging
+import mysql.connector
+from config.database import get_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+LOCK_NAME = 'matcha_schema_migrations'
+LOCK_TIMEOUT = 60
+
+
+def _migration_files():
+    """(version, path) of every migrations/NNNN_name.sql file, in version order"""
+    files = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith('.sql'):
+            files.append((filename[:-len('.sql')], os.path.join(MIGRATIONS_DIR, filename)))
+    return files
+
+
+def _statements(path):
+    with open(path, encoding='utf-8') as f:
+        sql = f.read()
+    return [statement.strip() for statement in re.split(r';\s*(?:\n|$)', sql) if statement.strip()]
+
+
+def pending_migrations(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+    return [(version, path) for version, path in _migration_files() if version not in applied]
+
+
+def run_migrations():
+    """
+    Apply the pending migrations in order and record them in schema_migrations.
+    A named lock keeps concurrent workers from migrating twice; statements are
+    written to be idempotent (IF NOT EXISTS, INSERT IGNORE) since MariaDB commits
+    DDL implicitly and a failed migration is simply retried on the next run.
+    Returns the list of applied versions, or None on error.
+    """
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            logging.error("Could not acquire the schema migration lock")
+            return None
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version VARCHAR(255) PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            applied = []
+            for version, path in pending_migrations(cursor):
+                for statement in _statements(path):
+                    cursor.execute(statement)
+                cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+                connection.commit()
+                applied.append(version)
+                logging.info(f"Applied migration {version}")
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    except mysql.connector.Error as err:
+        logging.error(f"Database error in run_migrations: {err}")
+        return None
+    finally:
+        if 'cursor' in locals() and cursor:
+            cursor.close()
+        if 'connection' in locals() and connection:
+            connection.close()
@@ -0,0 +1,50 @@
+"""
+Delivery of per-user socket events. Every socket of a logged-in user joins the
+user_<id> room on connect, so one emit to that room reaches each of the user's
+sessions exactly once and nobody else.
+"""
+import logging
+import threading
+from app import socketio
+from utils.presence import registry as presence
+
+_stats_lock = threading.Lock()
+_stats = {
+    "emitted": 0,      # emits, one per target user
+    "delivered": 0,    # sessions reached (on this process)
+    "offline": 0,      # targets without a session on any worker, they catch up from the stored notifications
+}
+
+
+def user_room(user_id):
+    return f"user_{user_id}"
+
+
+def conversation_room(conversation_id):
+    return f"conversation_{conversation_id}"
+
+
+def notify_user(user_id, data, event='new_notification'):
+    """
+    Send event to every session of user_id, returns the number of sessions reached
+    on this worker (the message queue forwards the event to the other workers)
+    """
+    room = user_room(user_id)
+    try:
+        sessions = sum(1 for _ in socketio.server.manager.get_participants('/', room))
+        socketio.emit(event, data, to=room)
+        offline = not sessions and not presence.is_online(user_id)
+    except Exception as e:
+        logging.error(f"Error notifying user {user_id}: {str(e)}")
+        return 0
+    with _stats_lock:
+        _stats["emitted"] += 1
+        _stats["delivered"] += sessions
+        if offline:
+            _stats["offline"] += 1
+    return sessions
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,32 @@
+import base64
+import json
+
+
+def encode_cursor(*values):
+    """Opaque, URL-safe cursor for the position (values) of the last item of a page"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Decode a cursor produced by encode_cursor into a tuple of `size` values.
+    Returns None for an empty cursor and raises ValueError when it is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return tuple(values)
+
+
+def parse_limit(value, default=20, maximum=100):
+    """Clamp a ?limit= query argument to [1, maximum]"""
+    if value is None:
+        return default
+    return max(1, min(int(value), maximum))
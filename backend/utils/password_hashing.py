@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from functools import lru_cache
+from eventlet import tpool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+HASH_METHOD = os.getenv('BACKEND_PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+# Hashes computed at the same time; the others wait their turn without blocking the hub
+MAX_CONCURRENT = int(os.getenv('BACKEND_PASSWORD_HASH_WORKERS') or 2)
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+_stats_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "wait_time_total": 0.0,
+    "wait_time_max": 0.0,
+    "hash_time_total": 0.0,
+}
+
+
+def _run(fn, *args):
+    """
+    Run a hashing call in eventlet's OS thread pool, at most MAX_CONCURRENT at a time.
+    hashlib's scrypt/pbkdf2 release the GIL, so the eventlet hub (and every socket
+    client) keeps running while a password is hashed.
+    """
+    requested_at = time.monotonic()
+    with _stats_lock:
+        _stats["queued"] += 1
+    with _slots:
+        started_at = time.monotonic()
+        with _stats_lock:
+            _stats["queued"] -= 1
+            _stats["running"] += 1
+            waited = started_at - requested_at
+            _stats["wait_time_total"] += waited
+            _stats["wait_time_max"] = max(_stats["wait_time_max"], waited)
+        try:
+            return tpool.execute(fn, *args)
+        finally:
+            with _stats_lock:
+                _stats["running"] -= 1
+                _stats["completed"] += 1
+                _stats["hash_time_total"] += time.monotonic() - started_at
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, HASH_METHOD)
+
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=1)
+def _method_tag():
+    # Werkzeug fills in default parameters, so compare against a real hash's prefix
+    return _run(generate_password_hash, '', HASH_METHOD, 1).split('$', 1)[0]
+
+
+def needs_rehash(pwhash):
+    """True when pwhash was made with other parameters than HASH_METHOD"""
+    return pwhash.split('$', 1)[0] != _method_tag()
+
+
+def stats():
+    with _stats_lock:
+        return {"method": HASH_METHOD, "max_concurrent": MAX_CONCURRENT, **_stats}
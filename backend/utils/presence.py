@@ -0,0 +1,233 @@
+"""
+Who is connected, and which conversation each socket has open.
+Shared through Redis when BACKEND_PRESENCE_URL (or a redis:// Socket.IO message
+queue) is set, so every backend worker sees the sessions of the others;
+otherwise kept in this process, which is enough for a single worker.
+
+Both registries index user -> {sid: open conversation} and sid -> user, so a
+disconnect is resolved without scanning. A user is online while it has at least
+one session: add_session/remove_session report the transitions, which are the
+only moments presence is announced and written to the database.
+"""
+import logging
+import os
+import threading
+import time
+from models.user_model import UserModel
+
+# Entries of a crashed worker are never removed explicitly, they expire
+SESSION_TTL = 24 * 3600
+# Seconds a transition waits before being written to users, so a page reload
+# (offline then online again) costs no write at all
+WRITE_DELAY = float(os.getenv('BACKEND_PRESENCE_WRITE_DELAY') or 5)
+
+
+class LocalPresence:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}  # user id -> {sid: open conversation id or ''}
+        self._sids = {}   # sid -> user id
+
+    def add_session(self, user_id, sid):
+        """Register sid, returns True when it is the user's first session"""
+        user_id = str(user_id)
+        with self._lock:
+            self._sids[sid] = user_id
+            sessions = self._users.setdefault(user_id, {})
+            sessions[sid] = ''
+            return len(sessions) == 1
+
+    def remove_session(self, sid):
+        """Forget sid, returns (user id, True when it was the user's last session)"""
+        with self._lock:
+            user_id = self._sids.pop(sid, None)
+            if user_id is None:
+                return None, False
+            sessions = self._users.get(user_id, {})
+            sessions.pop(sid, None)
+            if sessions:
+                return user_id, False
+            self._users.pop(user_id, None)
+            return user_id, True
+
+    def set_conversation(self, sid, conversation_id=None):
+        with self._lock:
+            user_id = self._sids.get(sid)
+            if user_id is not None:
+                self._users[user_id][sid] = str(conversation_id or '')
+
+    def is_online(self, user_id):
+        with self._lock:
+            return bool(self._users.get(str(user_id)))
+
+    def is_viewing(self, user_id, conversation_id):
+        with self._lock:
+            return str(conversation_id) in self._users.get(str(user_id), {}).values()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "local",
+                "users": len(self._users),
+                "sessions": len(self._sids),
+            }
+
+
+class RedisPresence:
+    """
+    presence:user:<id> = {sid: open conversation id or ''}, presence:sid:<sid> = user id,
+    presence:users = set of online user ids
+    """
+
+    # Atomic so two workers removing a user's last two sessions can't both miss the transition
+    REMOVE_SCRIPT = """
+        local user_id = redis.call('GET', KEYS[1])
+        if not user_id then
+            return false
+        end
+        redis.call('DEL', KEYS[1])
+        local key = 'presence:user:' .. user_id
+        redis.call('HDEL', key, ARGV[1])
+        local left = redis.call('HLEN', key)
+        if left == 0 then
+            redis.call('SREM', 'presence:users', user_id)
+        end
+        return {user_id, left}
+    """
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._remove = self._redis.register_script(self.REMOVE_SCRIPT)
+
+    @staticmethod
+    def _user_key(user_id):
+        return f"presence:user:{user_id}"
+
+    @staticmethod
+    def _sid_key(sid):
+        return f"presence:sid:{sid}"
+
+    def add_session(self, user_id, sid):
+        key = self._user_key(user_id)
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.set(self._sid_key(sid), str(user_id), ex=SESSION_TTL)
+        pipe.hset(key, sid, '')
+        pipe.expire(key, SESSION_TTL)
+        pipe.sadd("presence:users", str(user_id))
+        pipe.hlen(key)
+        return pipe.execute()[-1] == 1
+
+    def remove_session(self, sid):
+        result = self._remove(keys=[self._sid_key(sid)], args=[sid])
+        if not result:
+            return None, False
+        user_id, left = result
+        return user_id, int(left) == 0
+
+    def set_conversation(self, sid, conversation_id=None):
+        user_id = self._redis.get(self._sid_key(sid))
+        # Only for a session that is still registered, a late event must not resurrect it
+        if user_id is not None and self._redis.hexists(self._user_key(user_id), sid):
+            self._redis.hset(self._user_key(user_id), sid, str(conversation_id or ''))
+
+    def is_online(self, user_id):
+        return self._redis.exists(self._user_key(user_id)) > 0
+
+    def is_viewing(self, user_id, conversation_id):
+        return str(conversation_id) in self._redis.hvals(self._user_key(user_id))
+
+    def stats(self):
+        return {
+            "backend": "redis",
+            "users": self._redis.scard("presence:users"),
+        }
+
+
+class ConnectionStateWriter:
+    """
+    Background task mirroring presence transitions into users.is_connected and
+    users.latest_connection. Transitions are collected per user and written
+    WRITE_DELAY seconds later with the registry's state at that time, so flapping
+    connections collapse into at most one write (none when the user ends up in the
+    state it started from) and workers agree on the result.
+    """
+
+    def __init__(self, socketio, registry, delay=WRITE_DELAY):
+        self.socketio = socketio
+        self.registry = registry
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._pending = {}  # user id -> (online before the first transition, monotonic time of the last one)
+        self._started = False
+        self.writes = 0
+        self.skipped = 0
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def changed(self, user_id, online):
+        # The registries hand out str ids, the user caches the writes invalidate are keyed by int
+        user_id = int(user_id)
+        with self._lock:
+            before = self._pending[user_id][0] if user_id in self._pending else not online
+            self._pending[user_id] = (before, time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._started,
+                "pending": len(self._pending),
+                "writes": self.writes,
+                "skipped": self.skipped,
+            }
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(max(self.delay / 2, 0.5))
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error in connection state writer: {str(e)}")
+
+    def flush(self, force=False):
+        """Write the transitions older than delay (all of them with force)"""
+        now = time.monotonic()
+        with self._lock:
+            due = {user_id: before for user_id, (before, at) in self._pending.items()
+                   if force or now - at >= self.delay}
+            for user_id in due:
+                del self._pending[user_id]
+        for user_id, before in due.items():
+            online = self.registry.is_online(user_id)
+            if online == before:
+                self.skipped += 1
+                continue
+            if online:
+                UserModel.update_user_connection(user_id)
+            else:
+                UserModel.update_user_latest_connection(user_id)
+            self.writes += 1
+
+
+def _presence_url():
+    url = os.getenv('BACKEND_PRESENCE_URL')
+    if url:
+        return url
+    queue = os.getenv('BACKEND_SOCKETIO_MESSAGE_QUEUE') or ''
+    return queue if queue.startswith(('redis://', 'rediss://')) else None
+
+
+def _create_registry():
+    url = _presence_url()
+    if not url:
+        return LocalPresence()
+    logging.info("Using the Redis presence registry")
+    return RedisPresence(url)
+
+
+registry = _create_registry()
@@ -0,0 +1,60 @@
+import logging
+import mysql.connector
+from config.database import get_connection
+from models.conv_model import ConversationModel
+from models.user_model import UserModel, PotentialMatchFeed
+
+# Sample arguments: every optional clause (cursors, filters) is switched on so the
+# plans cover the most constrained shape of each query
+SAMPLE_USER = {
+    'looking_for': 'female',
+    'interests': '["art", "travel_places", "photography"]',
+    'latitude': 48.8566,
+    'longitude': 2.3522,
+}
+SAMPLE_CURSOR_TIME = '2024-01-01 00:00:00'
+
+
+def hot_queries():
+    """
+    Hot queries as the models build them, with the tables each one must reach
+    through an index: {name: ((sql, params), indexed table names or aliases)}.
+    """
+    feed = PotentialMatchFeed(1, min_age=20, max_age=35, distance=50, fame_rating=80,
+                              limit=20, cursor=(1, 1))
+    return {
+        'likes_received': (UserModel.likes_query(1), {'ui', 'ui2'}),
+        'matches_list': (UserModel.matches_query(1), {'ui1', 'ui2'}),
+        'profile_viewers': (UserModel.profile_viewers_query(1, 20, (SAMPLE_CURSOR_TIME, 1)), {'pv', 'u'}),
+        'conversation_messages': (ConversationModel.messages_query(1, 50, before_id=1000000), {'messages'}),
+        'conversation_sync': (ConversationModel.messages_query(1, 50, after_id=1), {'messages'}),
+        'user_conversations': (ConversationModel.conversations_page_query(1, 20, (SAMPLE_CURSOR_TIME, 1)),
+                               {'conversations', 'u1', 'u2'}),
+        'discovery_feed': (feed.build_query(SAMPLE_USER), {'users', 's', 'user_interactions', 'user_blocks'}),
+    }
+
+
+def check_query_plans():
+    """
+    EXPLAIN every hot query and report the ones where a table that should be read
+    through an index is fully scanned (access type ALL).
+    Returns a list of (query name, table, plan row) failures, or None on error.
+    """
+    try:
+        connection = get_connection()
+        cursor = connection.cursor(dictionary=True)
+        failures = []
+        for name, ((sql, params), indexed) in hot_queries().items():
+            cursor.execute("EXPLAIN " + sql, params)
+            for row in cursor.fetchall():
+                if row['table'] in indexed and row['type'] == 'ALL':
+                    failures.append((name, row['table'], row))
+        return failures
+    except mysql.connector.Error as err:
+        logging.error(f"Database error in check_query_plans: {err}")
+        return None
+    finally:
+        if 'cursor' in locals() and cursor:
+            cursor.close()
+        if 'connection' in locals() and connection:
+            connection.close()
@@ -0,0 +1,125 @@
+"""
+Typing indicators, relayed to the conversation room only when something changes.
+The state of every (user, conversation) pair is kept in this process: a 'typing'
+event that merely confirms the current state is dropped, except for a keepalive
+re-emitted at most every REEMIT_INTERVAL seconds, and a user who stops sending
+events is announced as no longer typing after TYPING_TIMEOUT seconds.
+
+The conversations a socket may type in are remembered for the socket's lifetime
+(the join already checked the membership), so a keystroke costs no query.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+# Minimum seconds between two identical 'typing' frames for the same user and conversation
+REEMIT_INTERVAL = float(os.getenv('BACKEND_TYPING_REEMIT_INTERVAL') or 3)
+# Seconds without any event after which a typing user is announced as stopped
+TYPING_TIMEOUT = float(os.getenv('BACKEND_TYPING_TIMEOUT') or 8)
+
+
+class TypingTracker:
+    def __init__(self, socketio, room, reemit_interval=REEMIT_INTERVAL, timeout=TYPING_TIMEOUT):
+        self.socketio = socketio
+        self.room = room  # conversation id -> room name, utils.notify.conversation_room
+        self.reemit_interval = reemit_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._allowed = {}  # sid -> set of conversation ids the socket is a member of
+        self._typing = {}   # (user id, conversation id) -> [sid, last emitted, last event] (monotonic)
+        self._started = False
+        self.received = 0
+        self.emitted = 0
+        self.expired = 0
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def allow(self, sid, conversation_id):
+        """Remember that the socket's user is a member of the conversation"""
+        with self._lock:
+            self._allowed.setdefault(sid, set()).add(str(conversation_id))
+
+    def is_allowed(self, sid, conversation_id):
+        with self._lock:
+            return str(conversation_id) in self._allowed.get(sid, ())
+
+    def update(self, user_id, sid, conversation_id, is_typing):
+        """Record a 'typing' event, emits typing_status when it has to be relayed"""
+        key = (str(user_id), str(conversation_id))
+        now = time.monotonic()
+        with self._lock:
+            self.received += 1
+            state = self._typing.get(key)
+            if is_typing:
+                if state is not None and now - state[1] < self.reemit_interval:
+                    state[0], state[2] = sid, now
+                    return False
+                self._typing[key] = [sid, now, now]
+            elif state is None:
+                return False
+            else:
+                del self._typing[key]
+        self._emit(user_id, conversation_id, is_typing)
+        return True
+
+    def stop(self, user_id, conversation_id):
+        """The user left the conversation, announce it stopped if it was typing"""
+        self.update(user_id, None, conversation_id, False)
+
+    def forget_socket(self, sid):
+        """Drop a disconnected socket, its user stops typing wherever it typed through it"""
+        with self._lock:
+            self._allowed.pop(sid, None)
+            stopped = [key for key, state in self._typing.items() if state[0] == sid]
+            for key in stopped:
+                del self._typing[key]
+        for user_id, conversation_id in stopped:
+            self._emit(user_id, conversation_id, False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._started,
+                "sockets": len(self._allowed),
+                "typing": len(self._typing),
+                "received": self.received,
+                "emitted": self.emitted,
+                "expired": self.expired,
+            }
+
+    def _emit(self, user_id, conversation_id, is_typing):
+        self.socketio.emit('typing_status', {
+            'type': 'typing',
+            'user_id': int(user_id),
+            'is_typing': is_typing,
+            'conversation_id': str(conversation_id),
+            'timestamp': datetime.now().isoformat()
+        }, to=self.room(conversation_id))
+        with self._lock:
+            self.emitted += 1
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(1)
+            try:
+                self.expire()
+            except Exception as e:
+                logging.error(f"Error in typing tracker: {str(e)}")
+
+    def expire(self):
+        """Announce as stopped the users without any event for timeout seconds"""
+        now = time.monotonic()
+        with self._lock:
+            stale = [key for key, state in self._typing.items() if now - state[2] >= self.timeout]
+            for key in stale:
+                del self._typing[key]
+            self.expired += len(stale)
+        for user_id, conversation_id in stale:
+            self._emit(user_id, conversation_id, False)
@@ -0,0 +1,160 @@
+"""
+Compiled matcher answering "does this text contain an English word (length >= 3)?"
+in one left-to-right scan.
+
+The word list is reduced to the words that contain no other word, since only the
+first match matters, and compiled into an Aho-Corasick automaton whose goto and
+failure links are folded into a dense DFA over a-z. The DFA is written to a small
+binary artifact that is memory-mapped by the backend, so startup never touches
+nltk or the network. Build it with:
+    python -m utils.word_automaton --output /opt/matcha/english_words.ac [--words words.txt]
+"""
+import argparse
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import deque
+from functools import lru_cache
+
+MAGIC = b'PWAC'
+VERSION = 1
+HEADER = struct.Struct('<4sIII')  # magic, version, state count, reserved (keeps the table 16-byte aligned)
+ALPHABET = 26
+MIN_WORD_LENGTH = 3
+DEFAULT_PATH = '/opt/matcha/english_words.ac'
+WORD_RE = re.compile(r'[a-z]+')
+
+
+def automaton_path():
+    return os.getenv('BACKEND_WORD_AUTOMATON_PATH') or DEFAULT_PATH
+
+
+def minimal_words(words):
+    """Lower-cased a-z words of length >= 3 that do not contain another such word"""
+    vocabulary = {w for w in (word.lower() for word in words) if len(w) >= MIN_WORD_LENGTH and WORD_RE.fullmatch(w)}
+    kept = []
+    for word in vocabulary:
+        n = len(word)
+        if not any(word[i:j] in vocabulary
+                   for i in range(n) for j in range(i + MIN_WORD_LENGTH, n + 1)
+                   if j - i < n):
+            kept.append(word)
+    return sorted(kept)
+
+
+def build(words):
+    """Compile words into the artifact bytes"""
+    goto = [[-1] * ALPHABET]
+    terminal = bytearray(b'\0')
+    for word in minimal_words(words):
+        state = 0
+        for ch in word:
+            c = ord(ch) - 97
+            if goto[state][c] == -1:
+                goto[state][c] = len(goto)
+                goto.append([-1] * ALPHABET)
+                terminal.append(0)
+            state = goto[state][c]
+        terminal[state] = 1
+
+    # Breadth-first fill of the missing transitions through the failure links; a
+    # state whose failure chain reaches a word end is terminal too
+    fail = [0] * len(goto)
+    queue = deque()
+    for c in range(ALPHABET):
+        child = goto[0][c]
+        if child == -1:
+            goto[0][c] = 0
+        else:
+            queue.append(child)
+    while queue:
+        state = queue.popleft()
+        if terminal[fail[state]]:
+            terminal[state] = 1
+        for c in range(ALPHABET):
+            child = goto[state][c]
+            if child == -1:
+                goto[state][c] = goto[fail[state]][c]
+            else:
+                fail[child] = goto[fail[state]][c]
+                queue.append(child)
+
+    table = array('i', (target for row in goto for target in row))
+    if table.itemsize != 4:
+        raise RuntimeError("array('i') is not 32-bit on this platform")
+    if struct.pack('=i', 1) != struct.pack('<i', 1):
+        table.byteswap()
+    return HEADER.pack(MAGIC, VERSION, len(goto), 0) + table.tobytes() + bytes(terminal)
+
+
+class WordAutomaton:
+    """Read-only view over a memory-mapped artifact"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, states, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} word automaton")
+        table_end = HEADER.size + states * ALPHABET * 4
+        if len(self._mmap) != table_end + states:
+            raise ValueError(f"{path} is truncated")
+        view = memoryview(self._mmap)
+        self._table = view[HEADER.size:table_end].cast('i')
+        self._terminal = view[table_end:]
+        self.states = states
+
+    def contains_word(self, text):
+        table = self._table
+        terminal = self._terminal
+        state = 0
+        for ch in text.lower():
+            c = ord(ch) - 97
+            if 0 <= c < ALPHABET:
+                state = table[state * ALPHABET + c]
+                if terminal[state]:
+                    return True
+            else:
+                state = 0
+        return False
+
+
+@lru_cache(maxsize=1)
+def load_automaton(path=None):
+    return WordAutomaton(path or automaton_path())
+
+
+def nltk_words():
+    import nltk
+    from nltk.corpus import words as nltk_corpus
+    try:
+        return nltk_corpus.words()
+    except LookupError:
+        nltk.download('words')
+        return nltk_corpus.words()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the English word automaton artifact")
+    parser.add_argument('--output', default=automaton_path())
+    parser.add_argument('--words', help="word list, one per line (default: the nltk words corpus)")
+    args = parser.parse_args()
+
+    if args.words:
+        with open(args.words, encoding='utf-8') as f:
+            words = [line.strip() for line in f if line.strip()]
+    else:
+        words = nltk_words()
+    data = build(words)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    tmp_path = args.output + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, args.output)
+    print(f"Wrote {args.output} ({len(data)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
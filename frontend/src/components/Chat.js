@@ -1,9 +1,26 @@
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import axios from '../config/axios';
 import { useWhoAmI } from '../context/WhoAmIContext';
 import { useNotifications } from '../context/NotificationContext';
 import '../styles/components/Chat.css';
 
+// Messages already loaded per conversation, so reopening a chat only fetches what is new
+const messageCache = new Map();
+
+const formatMessage = (msg) => ({
+    id: msg.id,
+    sender_id: msg.sender_id,
+    content: msg.message,
+    sent_at: msg.created_at,
+    messageKey: `server-${msg.id}`
+});
+
+// Append the messages not already present (a socket event may have delivered them first)
+const mergeMessages = (known, incoming) => {
+    const ids = new Set(known.map(msg => msg.id));
+    return [...known, ...incoming.filter(msg => !ids.has(msg.id))];
+};
+
 const Chat = ({ conversationId, otherUser }) => {
     const [messages, setMessages] = useState([]);
     const [newMessage, setNewMessage] = useState('');
@@ -11,8 +28,12 @@ const Chat = ({ conversationId, otherUser }) => {
     const [isTyping, setIsTyping] = useState(false);
     const [otherUserTyping, setOtherUserTyping] = useState(false);
     const [sendingMessage, setSendingMessage] = useState(false);
+    const [hasOlder, setHasOlder] = useState(false);
+    const [loadingOlder, setLoadingOlder] = useState(false);
+    const messagesRef = useRef([]);
     const messagesEndRef = useRef(null);
     const typingTimeoutRef = useRef(null);
+    const typingSentAtRef = useRef(0);
     const processedMessageIdsRef = useRef(new Set());
     const { socket, me } = useWhoAmI();
     const { setActiveConversation } = useNotifications();
@@ -31,6 +52,33 @@ const Chat = ({ conversationId, otherUser }) => {
         };
     }, [conversationId, setActiveConversation]);
 
+    // Keep the latest messages reachable from callbacks and cached for the next opening
+    useEffect(() => {
+        messagesRef.current = messages;
+        if (conversationId && !loading) {
+            messageCache.set(conversationId, { messages, hasOlder });
+        }
+    }, [conversationId, messages, hasOlder, loading]);
+
+    const rememberIds = useCallback((list) => {
+        list.forEach(msg => processedMessageIdsRef.current.add(msg.id));
+    }, []);
+
+    // Fetch everything sent after the last known message, page by page
+    const syncNewMessages = useCallback(async (known) => {
+        let fetched = [];
+        let hasMore = true;
+        while (hasMore) {
+            const last = fetched.length ? fetched[fetched.length - 1] : known[known.length - 1];
+            const response = await axios.get(`/api/conv/${conversationId}/messages`, {
+                params: { after_id: last.id }
+            });
+            fetched = [...fetched, ...response.data.messages.map(formatMessage)];
+            hasMore = response.data.has_more;
+        }
+        return fetched;
+    }, [conversationId]);
+
     // Fetch messages
     useEffect(() => {
         const fetchMessages = async () => {
@@ -38,26 +86,21 @@ const Chat = ({ conversationId, otherUser }) => {
                 setLoading(true);
                 // Reset the processed message IDs when conversation changes
                 processedMessageIdsRef.current = new Set();
-                
-                const response = await axios.get(`/api/conv/${conversationId}/messages`);
-                
-                // Transform messages if needed to match our component's expected format
-                const formattedMessages = response.data.map(msg => ({
-                    id: msg.id,
-                    sender_id: msg.sender?.id || msg.sender_id,
-                    content: msg.message || msg.content,
-                    sent_at: msg.created_at || msg.sent_at,
-                    messageKey: `server-${msg.id || Math.random().toString(36).substr(2, 9)}`
-                }));
-                
-                // Add all message IDs to the processed set
-                formattedMessages.forEach(msg => {
-                    if (msg.id) {
-                        processedMessageIdsRef.current.add(msg.id);
-                    }
-                });
-                
-                setMessages(formattedMessages);
+
+                const cached = messageCache.get(conversationId);
+                if (cached && cached.messages.length > 0) {
+                    const newer = await syncNewMessages(cached.messages);
+                    const merged = mergeMessages(cached.messages, newer);
+                    rememberIds(merged);
+                    setMessages(merged);
+                    setHasOlder(cached.hasOlder);
+                } else {
+                    const response = await axios.get(`/api/conv/${conversationId}/messages`);
+                    const latest = response.data.messages.map(formatMessage);
+                    rememberIds(latest);
+                    setMessages(latest);
+                    setHasOlder(response.data.has_more);
+                }
                 setLoading(false);
                 // Use setTimeout to ensure DOM is updated before scrolling
                 setTimeout(scrollToBottom, 100);
@@ -68,12 +111,50 @@ const Chat = ({ conversationId, otherUser }) => {
         };
 
         if (conversationId) {
-            // Use a flag to prevent duplicate API calls
-            const controller = new AbortController();
             fetchMessages();
-            return () => controller.abort();
         }
-    }, [conversationId]);
+    }, [conversationId, syncNewMessages, rememberIds]);
+
+    // Catch up on the messages missed while the socket was disconnected
+    useEffect(() => {
+        if (!socket || !conversationId) {
+            return;
+        }
+        const handleReconnect = async () => {
+            if (messagesRef.current.length === 0) {
+                return;
+            }
+            try {
+                const newer = await syncNewMessages(messagesRef.current);
+                rememberIds(newer);
+                setMessages(prev => mergeMessages(prev, newer));
+            } catch (error) {
+                console.error('Error syncing messages:', error);
+            }
+        };
+        socket.io.on('reconnect', handleReconnect);
+        return () => {
+            socket.io.off('reconnect', handleReconnect);
+        };
+    }, [socket, conversationId, syncNewMessages, rememberIds]);
+
+    const loadOlderMessages = async () => {
+        if (loadingOlder || messages.length === 0) return;
+        try {
+            setLoadingOlder(true);
+            const response = await axios.get(`/api/conv/${conversationId}/messages`, {
+                params: { before_id: messages[0].id }
+            });
+            const older = response.data.messages.map(formatMessage);
+            rememberIds(older);
+            setMessages(prev => [...older, ...prev]);
+            setHasOlder(response.data.has_more);
+        } catch (error) {
+            console.error('Error loading older messages:', error);
+        } finally {
+            setLoadingOlder(false);
+        }
+    };
 
     // Socket event handlers
     useEffect(() => {
@@ -180,8 +261,11 @@ const Chat = ({ conversationId, otherUser }) => {
     // Handle typing status
     const handleTyping = () => {
         if (!socket) return;
-        if (!isTyping) {
+        // The server relays state changes only; while typing, a keepalive every few
+        // seconds keeps the indicator from expiring on the other side
+        if (!isTyping || Date.now() - typingSentAtRef.current >= 3000) {
             setIsTyping(true);
+            typingSentAtRef.current = Date.now();
             socket.emit('typing', {
                 conversation_id: conversationId,
                 is_typing: true
@@ -267,6 +351,11 @@ const Chat = ({ conversationId, otherUser }) => {
             </div>
 
             <div className="chat-messages">
+                {hasOlder && (
+                    <button className="load-older" onClick={loadOlderMessages} disabled={loadingOlder}>
+                        {loadingOlder ? 'Loading...' : 'Load older messages'}
+                    </button>
+                )}
                 {messages.length === 0 ? (
                     <div className="no-messages">
                         No messages yet. Start the conversation!
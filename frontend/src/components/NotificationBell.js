@@ -7,7 +7,7 @@ import '../styles/components/NotificationBell.css';
 
 const NotificationBell = () => {
   const [isOpen, setIsOpen] = useState(false);
-  const { notifications, unreadCount, markAsRead, markAllAsRead } = useNotifications();
+  const { notifications, unreadCount, markAsRead, markAllAsRead, hasMoreNotifications, loadMoreNotifications } = useNotifications();
   const dropdownRef = useRef(null);
   const navigate = useNavigate();
 
@@ -130,6 +130,11 @@ const NotificationBell = () => {
                 </div>
               ))
             )}
+            {hasMoreNotifications && (
+              <button className="mark-all-read" onClick={loadMoreNotifications}>
+                Load more
+              </button>
+            )}
           </div>
         </div>
       )}
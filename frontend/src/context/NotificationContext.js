@@ -5,6 +5,26 @@ import axios from '../config/axios';
 // Create the context
 const NotificationContext = createContext();
 
+const NOTIFICATIONS_PAGE_SIZE = 20;
+
+// Function to generate notification message based on type
+const getNotificationMessage = (data) => {
+  switch (data.type) {
+    case 'match':
+      return `You matched with ${data.user?.firstname || 'someone new'}!`;
+    case 'like':
+      return `${data.user?.firstname || 'Someone'} liked your profile!`;
+    case 'message':
+      return `New message from ${data.sender?.firstname || 'someone'}`;
+    case 'unmatch':
+      return `${data.user?.firstname || 'Someone'} unmatched with you`;
+    case 'view':
+      return `${data.user?.firstname || 'Someone'} viewed your profile`;
+    default:
+      return 'You have a new notification';
+  }
+};
+
 // Custom hook to use the notification context
 export const useNotifications = () => {
   const context = useContext(NotificationContext);
@@ -18,8 +38,48 @@ export const NotificationProvider = ({ children }) => {
   const [notifications, setNotifications] = useState([]);
   const [unreadCount, setUnreadCount] = useState(0);
   const [activeConversation, setActiveConversation] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const { socket, me } = useWhoAmI();
 
+  // Load stored notifications; the first page also resets the unread counter
+  const fetchNotifications = useCallback(async (cursor = null) => {
+    try {
+      const response = await axios.get('/api/user/notifications', {
+        params: {
+          limit: NOTIFICATIONS_PAGE_SIZE,
+          cursor: cursor || undefined
+        }
+      });
+      const page = response.data.notifications.map(data => ({
+        id: data.id,
+        type: data.type,
+        message: getNotificationMessage(data),
+        timestamp: data.timestamp,
+        data: data,
+        read: data.read
+      }));
+      setNotifications(prev => cursor ? [...prev, ...page] : page);
+      if (!cursor) {
+        setUnreadCount(response.data.unread_count);
+      }
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching notifications:', error);
+    }
+  }, []);
+
+  const loadMoreNotifications = useCallback(() => {
+    if (nextCursor) {
+      fetchNotifications(nextCursor);
+    }
+  }, [nextCursor, fetchNotifications]);
+
+  useEffect(() => {
+    if (me) {
+      fetchNotifications();
+    }
+  }, [me, fetchNotifications]);
+
   // Add a new notification
   const addNotification = useCallback((notification) => {
     setNotifications(prev => {
@@ -85,16 +145,8 @@ export const NotificationProvider = ({ children }) => {
     // Only update if the value is actually changing
     setActiveConversation(prevConversation => {
       if (prevConversation === conversationId) return prevConversation;
-      
-      // Tell the backend about the active conversation change
-      if (socket) {
-        if (conversationId) {
-          socket.emit('join_chat', { conversation_id: conversationId });
-        } else if (prevConversation) {
-          socket.emit('leave_chat', { conversation_id: prevConversation });
-        }
-      }
-      
+      // The backend learns about the open conversation from Chat's join/leave_conversation events
+
       // Mark all message notifications for this conversation as read
       if (conversationId) {
         try {
@@ -121,7 +173,7 @@ export const NotificationProvider = ({ children }) => {
       
       return conversationId;
     });
-  }, [socket]);
+  }, []);
 
   // Listen for socket notifications
   useEffect(() => {
@@ -129,24 +181,6 @@ export const NotificationProvider = ({ children }) => {
       return;
     }
 
-    // Function to generate notification message based on type
-    const getNotificationMessage = (data) => {
-      switch (data.type) {
-        case 'match':
-          return `You matched with ${data.user?.firstname || 'someone new'}!`;
-        case 'like':
-          return `${data.user?.firstname || 'Someone'} liked your profile!`;
-        case 'message':
-          return `New message from ${data.sender?.firstname || 'someone'}`;
-        case 'unmatch':
-          return `${data.user?.firstname || 'Someone'} unmatched with you`;
-        case 'view':
-          return `${data.user?.firstname || 'Someone'} viewed your profile`;
-        default:
-          return 'You have a new notification';
-      }
-    };
-
     // Handle all types of notifications
     const handleNotification = (data) => {
       // Skip message notifications for the active conversation
@@ -173,16 +207,9 @@ export const NotificationProvider = ({ children }) => {
     };
 
     // Set up socket listeners
+    // Catch up on what was stored while the socket was disconnected
+    socket.on('connect', () => fetchNotifications());
     socket.on('new_notification', handleNotification);
-    // Also listen for broadcast notifications (fallback)
-    socket.on('broadcast_notification', (data) => {
-      // Only process if this notification is for the current user
-      if (data.target_user_id && data.target_user_id === me.id) {
-        handleNotification(data);
-      } else {
-        
-      }
-    });
     // Listen for notification read events
     socket.on('notification_read', (data) => {
       if (data.notification_id) {
@@ -211,7 +238,6 @@ export const NotificationProvider = ({ children }) => {
     // Clean up listeners on unmount
     return () => {
       socket.off('new_notification');
-      socket.off('broadcast_notification');
       socket.off('notification_read');
       socket.off('notification_type_read');
       socket.off('all_notifications_read');
@@ -219,7 +245,7 @@ export const NotificationProvider = ({ children }) => {
       socket.off('disconnect');
       socket.off('connect_error');
     };
-  }, [socket, me, addNotification, markAsRead, markAllAsRead, activeConversation]);
+  }, [socket, me, addNotification, markAsRead, markAllAsRead, activeConversation, fetchNotifications]);
 
   // Value to be provided by the context
   const value = {
@@ -230,6 +256,8 @@ export const NotificationProvider = ({ children }) => {
     markAllAsRead,
     clearNotification,
     clearAllNotifications,
+    hasMoreNotifications: Boolean(nextCursor),
+    loadMoreNotifications,
     activeConversation,
     setActiveConversation: setActiveConversationId
   };
@@ -43,11 +43,6 @@ export const WhoAmIProvider = ({ children }) => {
             }
         });
         
-        newSocket.on('connect', () => {
-            // Explicitly join the user's personal room for notifications
-            newSocket.emit('join_room', { room: `user_${me.id}` });
-        });
-        
         newSocket.on('connect_error', (error) => {
             console.error('Socket connection error:', error);
             socketInitializedRef.current = false;
@@ -7,29 +7,50 @@ import PageHeader from '../components/PageHeader';
 import { ChevronRightIcon } from '../components/Icons';
 import '../styles/pages/Chats.css';
 
+const CONVERSATIONS_PAGE_SIZE = 20;
+
 const Chats = () => {
     const [conversations, setConversations] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [selectedConversation, setSelectedConversation] = useState(null);
     const [loading, setLoading] = useState(true);
     const { me, socket } = useWhoAmI();
     const conversationsListRef = useRef(null);
     const [isDrawerOpen, setIsDrawerOpen] = useState(false);
 
-    const fetchConversations = useCallback(async () => {
+    const fetchConversations = useCallback(async (cursor = null) => {
         try {
             if (!me) {
                 setLoading(false);
                 return;
             }
-            const response = await axios.get('/api/conv/list');
-            setConversations(response.data);
+            const response = await axios.get('/api/conv/list', {
+                params: {
+                    limit: CONVERSATIONS_PAGE_SIZE,
+                    cursor: cursor || undefined
+                }
+            });
+            setConversations(prev => cursor ? [...prev, ...response.data.conversations] : response.data.conversations);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
             console.error('Error fetching conversations:', error);
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     }, [me]);
 
+    // Load the next page when the list is scrolled near its end
+    const handleConversationsScroll = () => {
+        const list = conversationsListRef.current;
+        if (!list || !nextCursor || loadingMore) return;
+        if (list.scrollTop + list.clientHeight >= list.scrollHeight - 100) {
+            setLoadingMore(true);
+            fetchConversations(nextCursor);
+        }
+    };
+
     // Fetch conversations when component mounts
     useEffect(() => {
         // Use AbortController to prevent duplicate API calls
@@ -133,6 +154,7 @@ const Chats = () => {
                     <div 
                         className={`conversations-list ${isDrawerOpen ? 'open' : ''}`} 
                         ref={conversationsListRef}
+                        onScroll={handleConversationsScroll}
                     >
                         {validConversations.length === 0 ? (
                             <div className="no-conversations">
@@ -7,12 +7,15 @@ import '../styles/pages/shared.css';
 import '../styles/pages/Home.css';
 import { IoClose, IoHeart } from 'react-icons/io5';
 
+const MATCHES_PAGE_SIZE = 20;
+
 const Home = () => {
     const [isFilterOpen, setIsFilterOpen] = useState(false);
     const [minAge, setMinAge] = useState(18);
     const [maxAge, setMaxAge] = useState(50);
     const [selectedGender, setSelectedGender] = useState('female');
     const [potentialMatches, setPotentialMatches] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [currentIndex, setCurrentIndex] = useState(0);
     const [isUpdating, setIsUpdating] = useState(false);
     const [distance, setDistance] = useState(10);
@@ -68,17 +71,21 @@ const Home = () => {
         }
     };
 
-    const fetchPotentialMatches = useCallback(async () => {
+    const fetchPotentialMatches = useCallback(async (cursor = null) => {
         try {
             const response = await axios.get('/api/user/matches', {
                 params: {
                     min_age: minAge,
                     max_age: maxAge,
                     distance: distance,
-                    fame_rating: fameRating
+                    fame_rating: fameRating,
+                    limit: MATCHES_PAGE_SIZE,
+                    cursor: cursor || undefined
                 }
             });
-            setPotentialMatches(response.data);
+            // Pages come from a cursor-based feed: append when continuing, replace otherwise
+            setPotentialMatches(prev => cursor ? [...prev, ...response.data.matches] : response.data.matches);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
             console.error('Error fetching matches:', error);
         }
@@ -92,9 +99,9 @@ const Home = () => {
                 await axios.post(`/api/user/dislike/${userId}`);
             }
             setCurrentIndex(prevIndex => prevIndex + 1);
-            // If we're running low on cards, fetch more
-            if (currentIndex >= potentialMatches.length - 3) {
-                fetchPotentialMatches();
+            // If we're running low on cards, fetch the next page
+            if (currentIndex >= potentialMatches.length - 3 && nextCursor) {
+                fetchPotentialMatches(nextCursor);
             }
         } catch (error) {
             console.error('Error processing swipe:', error);
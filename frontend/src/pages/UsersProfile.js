@@ -4,6 +4,7 @@ import BottomNavBar from '../components/BottomNavBar';
 import PageHeader from '../components/PageHeader';
 import ConfirmationPopup from '../components/ConfirmationPopup';
 import axios from '../config/axios';
+import { useWhoAmI } from '../context/WhoAmIContext';
 import '../styles/pages/shared.css';
 import '../styles/pages/Profile.css';
 
@@ -20,6 +21,7 @@ const UsersProfile = () => {
     const optionsRef = useRef(null);
     const { userId } = useParams();
     const navigate = useNavigate();
+    const { socket } = useWhoAmI();
     const [isBlocked, setIsBlocked] = useState(false);
     const [isReported, setIsReported] = useState(false);
     const [isConnected, setIsConnected] = useState(false);
@@ -99,6 +101,20 @@ const UsersProfile = () => {
         };
         loadUserProfile();
     }, [userId, navigate]);
+
+    // Live online status, sent to the users who have a conversation with this one
+    useEffect(() => {
+        if (!socket) return;
+        const handleUserStatus = (data) => {
+            if (data.user_id === parseInt(userId)) {
+                setIsConnected(data.status === 'online');
+            }
+        };
+        socket.on('user_status', handleUserStatus);
+        return () => {
+            socket.off('user_status', handleUserStatus);
+        };
+    }, [socket, userId]);
     useEffect(() => {
         const handleClickOutside = (event) => {
             if (optionsRef.current && !optionsRef.current.contains(event.target)) {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import BottomNavBar from '../components/BottomNavBar';
 import PageHeader from '../components/PageHeader';
@@ -6,25 +6,35 @@ import axios from '../config/axios';
 import '../styles/pages/shared.css';
 import '../styles/pages/Viewers.css';
 
+const VIEWERS_PAGE_SIZE = 20;
+
 const Viewers = () => {
     const [loading, setLoading] = useState(true);
-    const [user, setUser] = useState(null);
+    const [viewers, setViewers] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const navigate = useNavigate();
 
-    useEffect(() => {
-        const loadProfile = async () => {
-            try {
-                const response = await axios.get('/api/user/profile');
-                setUser(response.data);
-            } catch (error) {
-                console.error('Error loading profile:', error);
-            } finally {
-                setLoading(false);
-            }
-        };
-        loadProfile();
+    const fetchViewers = useCallback(async (cursor = null) => {
+        try {
+            const response = await axios.get('/api/user/viewers', {
+                params: {
+                    limit: VIEWERS_PAGE_SIZE,
+                    cursor: cursor || undefined
+                }
+            });
+            setViewers(prev => cursor ? [...prev, ...response.data.viewers] : response.data.viewers);
+            setNextCursor(response.data.next_cursor);
+        } catch (error) {
+            console.error('Error loading viewers:', error);
+        } finally {
+            setLoading(false);
+        }
     }, []);
 
+    useEffect(() => {
+        fetchViewers();
+    }, [fetchViewers]);
+
     const handleVisit = (viewerId) => {
         navigate(`/user/${viewerId}`);
     };
@@ -49,8 +59,8 @@ const Viewers = () => {
             <div className="content">
                 <div className="viewers-list">
                 <h1 className="page-title">Profile views</h1>
-                    {user.viewers && user.viewers.length > 0 ? (
-                        user.viewers.map((viewer) => (
+                    {viewers.length > 0 ? (
+                        viewers.map((viewer) => (
                             <div key={viewer.id} className="viewer-item">
                                 <div className="viewer-info">
                                     <img src={`./shared/uploads` + viewer.photo} alt={viewer.username} className="viewer-photo" />
@@ -70,6 +80,16 @@ const Viewers = () => {
                     ) : (
                         <p>No viewers available</p>
                     )}
+                    {nextCursor && (
+                        <div className="viewer-item">
+                            <button
+                                className="visit-button"
+                                onClick={() => fetchViewers(nextCursor)}
+                            >
+                                Load more
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
             <BottomNavBar />
@@ -29,7 +29,8 @@ CREATE TABLE IF NOT EXISTS users (
     match_score INT DEFAULT 0,
     match_type ENUM('love', 'friends', 'fling', 'business'),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_users_location (latitude, longitude)
 );
 
 INSERT INTO users (username, email, password, firstname, gender, looking_for, bio, job, birthdate, country, city, suburb, latitude, longitude, interests, is_first_login, photos, match_type, is_connected, latest_connection) VALUES
@@ -559,6 +560,43 @@ CREATE TABLE IF NOT EXISTS user_interactions (
     FOREIGN KEY (target_user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INT PRIMARY KEY,
+    likes_count INT NOT NULL DEFAULT 0,
+    dislikes_count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_blocks (
+    blocker_id INT NOT NULL,
+    blocked_id INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (blocker_id, blocked_id),
+    INDEX idx_user_blocks_blocked (blocked_id, blocker_id),
+    FOREIGN KEY (blocker_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (blocked_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_reports (
+    reporter_id INT NOT NULL,
+    reported_id INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (reporter_id, reported_id),
+    INDEX idx_user_reports_reported (reported_id, reporter_id),
+    FOREIGN KEY (reporter_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (reported_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS profile_views (
+    viewed_id INT NOT NULL,
+    viewer_id INT NOT NULL,
+    viewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (viewed_id, viewer_id),
+    INDEX idx_profile_views_recent (viewed_id, viewed_at, viewer_id),
+    FOREIGN KEY (viewed_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (viewer_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 CREATE TABLE IF NOT EXISTS conversations (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user1_id INT NOT NULL,